@@ -0,0 +1,83 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Polling watch mode (`--watch`) shared by `vlog2ipxact.py`, `view2ipxact.py`
+# and `xactcatalog.py`.
+
+import os
+import time
+import pathlib
+import logging
+from typing import List
+
+
+# returns paths whose `os.stat()` changed since the last call
+def poll_files(paths: List[str], stats: dict):
+    changed = [];
+    for p in paths:
+        try:
+            st = os.stat(p);
+            st = (st.st_mtime_ns, st.st_size);
+        except OSError:
+            st = None;
+        if p not in stats or stats[p] != st:
+            stats[p] = st;
+            changed.append(p);
+    return changed;
+
+
+# writes `text` into `path`; with `last` given (a dictionary of the last
+# written contents by path), files already holding the `text` are not
+# rewritten; returns if the file was written
+def write_output(path: pathlib.Path, text: str, last: dict = None):
+    if last is not None:
+        key = str(path);
+        if key not in last:
+            try:
+                with open(key, 'r') as f:
+                    last[key] = f.read();
+            except OSError:
+                last[key] = None;
+        if last[key] == text:
+            return False;
+        last[key] = text;
+
+    with open(str(path), 'w') as f:
+        f.write(text);
+    return True;
+
+
+# Polls `paths` every `interval` seconds and calls `rebuild(changed)` with
+# the changed ones (all of them on the first poll) until interrupted.
+# `rebuild` returns the list of written files, or `None` on error. It may
+# append paths to watch to `paths`, which get watched from their current
+# state on. Writes of `rebuild` to watched files (e.g. a component updated in
+# place) do not count as changes.
+def watch(paths: List[str], rebuild, interval: float):
+    stats = {};
+    logging.info(f"watching {len(paths)} files");
+    while True:
+        changed = poll_files(paths, stats);
+        if changed:
+            t = time.monotonic();
+            n = len(paths);
+            written = rebuild(changed);
+            if written:
+                logging.info(f"{len(changed)} files changed, {', '.join(written)} updated in {time.monotonic()-t:.3f}s");
+            elif written is not None:
+                logging.info(f"{len(changed)} files changed, outputs up to date");
+
+            poll_files(paths[n:] + [p for p in (written or []) if p in stats], stats);
+
+        time.sleep(interval);
@@ -0,0 +1,123 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Tests of the module summary cache (`--cache-dir`), which do not need
+# `verible` (the Python interpreter stands in for its executable).
+
+import os
+import sys
+import pathlib
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]));
+
+import vlog2ipxact
+from vlog2ipxact import ModuleCache, Parameter, Port, TypeDimension
+
+
+def summary(path: str):
+    return [{'name': 'm', 'path': path,
+        'ports': [Port('a', direction='input', datatype='logic', dimensions=[TypeDimension('N-1', '0')])],
+        'parameters': [Parameter('N', value='4')], 'instances': ['sub'], 'uses': None, 'overrides': [()]}];
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModuleCache(tmp_path / 'cache', sys.executable);
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'm.v';
+    path.write_text('module m(a); input a; sub u (); endmodule\n');
+    return str(path);
+
+
+def test_hit(cache, source, tmp_path):
+    key = cache.key(source);
+    assert cache.get(key, source) is None;
+    cache.put(key, summary(source));
+
+    modules = cache.get(key, source);
+    assert [str(p) for p in modules[0]['ports']] == ['input logic [N-1:0] a'];
+    assert modules[0]['parameters'] == [Parameter('N', value='4')];
+    assert modules[0]['path'] == source;
+
+    # entries are shared by files of the same content
+    copy = tmp_path / 'copy.v';
+    copy.write_text(pathlib.Path(source).read_text());
+    assert cache.key(str(copy)) == key;
+    assert cache.get(key, str(copy))[0]['path'] == str(copy);
+
+
+def test_invalidation(cache, source, tmp_path, monkeypatch):
+    key = cache.key(source);
+    cache.put(key, summary(source));
+
+    pathlib.Path(source).write_text('module m(a); input a; endmodule\n');
+    assert cache.key(source) != key;
+    assert cache.get(cache.key(source), source) is None;
+    pathlib.Path(source).write_text('module m(a); input a; sub u (); endmodule\n');
+    assert cache.key(source) == key;
+
+    # summaries of other tools, variants and cache versions are not reused
+    other = ModuleCache(tmp_path / 'cache', sys.executable, variant='netlist');
+    assert other.key(source) != key;
+    other.tool = 'other';
+    assert other.key(source) != ModuleCache(tmp_path / 'cache', sys.executable, variant='netlist').key(source);
+    monkeypatch.setattr(ModuleCache, 'version', ModuleCache.version + 1);
+    assert cache.key(source) != key;
+
+    assert cache.key(str(tmp_path / 'missing.v')) is None;
+
+
+def test_broken_entry(cache, source):
+    key = cache.key(source);
+    (cache.path / (key + '.pickle')).write_bytes(b'broken');
+    assert cache.get(key, source) is None;
+    cache.put(key, summary(source));
+    assert cache.get(key, source)[0]['name'] == 'm';
+
+
+def test_tool_version_fallback(tmp_path):
+    assert ModuleCache.getToolVersion(str(tmp_path / 'missing')) == str(tmp_path / 'missing');
+    tool = tmp_path / 'tool';
+    tool.write_text('');
+    assert ModuleCache.getToolVersion(str(tool)).startswith(str(tool) + ':0:');
+
+
+def test_process_files_uses_hits(cache, source):
+    # the pre-scanner does not support non-ANSI ports, hence the file would
+    # need `verible` (no parser given) unless found in the cache
+    cache.put(cache.key(source), summary(source));
+    modules = vlog2ipxact.process_files(None, [source], cache=cache, split=True, prescan=True);
+    assert [[m['name'] for m in r] for r in modules] == [['m']];
+
+
+def test_eviction(cache, tmp_path):
+    keys = [];
+    for i in range(4):
+        path = tmp_path / f'{i}.v';
+        path.write_text(f'module m{i}; endmodule\n');
+        keys.append(cache.key(str(path)));
+        cache.put(keys[-1], summary(str(path)));
+        entry = cache.path / (keys[-1] + '.pickle');
+        os.utime(entry, (i, i));
+    size = (cache.path / (keys[0] + '.pickle')).stat().st_size;
+
+    # a hit marks the entry as recently used
+    cache.get(keys[0], str(tmp_path / '0.v'));
+    cache.maxSize = 2 * size;
+    cache.evict();
+    assert sorted(p.stem for p in cache.path.glob('*.pickle')) == sorted([keys[0], keys[3]]);
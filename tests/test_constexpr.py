@@ -0,0 +1,128 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Tests of constant expression evaluation (`--evaluate`), which does not need
+# `verible`.
+
+import sys
+import pathlib
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]));
+
+import vlog2ipxact
+from vlog2ipxact import ConstExpr, ParameterEnv, Parameter, TypeDimension
+
+
+def evaluate(text: str, env: dict = None):
+    return ParameterEnv().evaluate(text) if env is None else ParameterEnv(env).evaluate(text);
+
+
+@pytest.mark.parametrize('text, value', [
+    ("4'hFF", 15),
+    ("8'd200 + 8'd100", 44),
+    ("8'd200 + 100", 300),
+    ("4'd0 - 1", 4294967295),
+    ("4'd0 - 4'd1", 15),
+    ("1 << 32", 0),
+    ("64'd1 << 32", 4294967296),
+    ("2 ** 31", -2147483648),
+    ("-7 / 2", -3),
+    ("-7 % 2", -1),
+    ("4'sb1000 >>> 1", -4),
+    ("4'b1000 >>> 1", 4),
+    ("$clog2(1)", 0),
+    ("$clog2(256)", 8),
+    ("$clog2(257)", 9),
+    ("$signed(4'hF)", -1),
+    ("8'hFF == -1", 0),
+    ("8'shFF == -1", 1),
+    ("1 ? 8'd3 : 16'd4", 3),
+    ("0 && 1/0", 0),
+])
+def test_evaluate(text, value):
+    assert evaluate(text) == value;
+
+
+@pytest.mark.parametrize('text', [
+    "1 / 0",
+    "$bits(x)",
+    "x + 1",
+    "8'd1F",
+    "4294967296",
+    "1 +",
+    "1.5",
+])
+def test_evaluate_unsupported(text):
+    assert evaluate(text) is None;
+
+
+def test_value_keeps_symbolic_width():
+    tree = ConstExpr.parse("8'd1 + 8'd2");
+    assert ConstExpr.value(tree, {}) == (3, 8, False);
+    assert ConstExpr.value(tree, {}, 4, True) == (3, 4, True);
+    assert ConstExpr.value(ConstExpr.parse("-1"), {}, 4, False) == (15, 4, False);
+
+
+def test_parsed_expressions_are_bounded(monkeypatch):
+    monkeypatch.setattr(ConstExpr, 'parsed', {});
+    monkeypatch.setattr(ConstExpr, 'maxParsed', 4);
+    for i in range(10):
+        assert ConstExpr.parse(str(i)) is not None;
+        assert len(ConstExpr.parsed) <= 4;
+
+
+def test_parameters_take_declared_types():
+    env = ParameterEnv([
+        Parameter('M', dimensions=[TypeDimension('7', '0')], value='-1'),
+        Parameter('B', datatype='bit', value='5'),
+        Parameter('S', datatype='bit signed', dimensions=[TypeDimension('3', '0')], value='8'),
+        Parameter('I', datatype='int', value="32'hFFFFFFFF"),
+        Parameter('U', datatype='int unsigned', value="-1"),
+        Parameter('N', value='M + 1'),
+        Parameter('R', datatype='real', value='1.5'),
+        Parameter('T', datatype='my_t', value='1'),
+        Parameter('X', value='R + 1'),
+    ]);
+    assert env.parameter('M') == 255;
+    assert env.parameter('B') == 1;
+    assert env.parameter('S') == -8;
+    assert env.parameter('I') == -1;
+    assert env.parameter('U') == 4294967295;
+    # `M + 1` is sized by the 8 bits of `M` and 32 bits of `1`
+    assert env.parameter('N') == 256;
+    assert env.parameter('R') is None;
+    assert env.parameter('T') is None;
+    assert env.parameter('X') is None;
+    assert env.width([TypeDimension('M', '0')]) == 256;
+    assert env.width([TypeDimension('0', 'B'), TypeDimension('3', '0')]) == 8;
+    assert env.width([TypeDimension('R', '0')]) is None;
+
+
+def test_parameter_overrides():
+    params = [Parameter('N', value='4'), Parameter('W', value='N * 2')];
+    assert ParameterEnv(params).parameter('W') == 8;
+    assert ParameterEnv(params, {'N': '8'}).parameter('W') == 16;
+    assert ParameterEnv.get(params, {'N': '8'}) is ParameterEnv.get(params, {'N': '8'});
+
+
+def test_parameter_xml_keeps_expression():
+    env = ParameterEnv([Parameter('N', value='4'), Parameter('W', value='N * 2')]);
+    ns = vlog2ipxact.XactNamespace();
+    value = Parameter('W', value='N * 2').etXact(env=env).find(ns.compileTag('value'));
+    assert value.text == 'N * 2';
+    assert value.get(ns.compileTag('value', 'vlog2ipxact')) == '8';
+    # plain numbers get no evaluated value
+    value = Parameter('N', value='4').etXact(env=env).find(ns.compileTag('value'));
+    assert value.get(ns.compileTag('value', 'vlog2ipxact')) is None;
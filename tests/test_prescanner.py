@@ -0,0 +1,97 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Tests of the built-in pre-scanner (`--prescan`), which does not need
+# `verible`. Its agreement with `verible` is tested in `test_vlog2ipxact.py`.
+
+import sys
+import pathlib
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]));
+
+import vlog2ipxact
+from vlog2ipxact import Prescanner, PrescanUnsupported
+
+
+def prescan(text: str):
+    return {m['name']: m for m in Prescanner(text).modules('test.v')};
+
+
+def test_ansi_module():
+    modules = prescan('''
+`timescale 1ns/1ps
+// module c1;
+/* module c2; */
+module top #(parameter int N = 4, parameter [3:0] W = N*2) (
+  input  wire clk,
+  input  logic [W-1:0] d,
+  output reg signed [7:0] q
+);
+  localparam L = 3;
+  sub #(.N(N)) u1 (.a(clk));
+  sub u2 ();
+  initial $display("module s;");
+endmodule
+module sub(input a); endmodule
+''');
+    assert list(modules) == ['top', 'sub'];
+    top = modules['top'];
+    assert [str(p) for p in top['parameters']] == ['int N = 4', '[3:0] W = N*2'];
+    assert [str(p) for p in top['ports']] == ['input wire clk', 'input logic [W-1:0] d', 'output reg signed [7:0] q'];
+    assert top['instances'] == ['sub', 'sub'];
+    assert top['overrides'] == [(('N','N'),), ()];
+    assert [str(p) for p in modules['sub']['ports']] == ['input a'];
+    assert not modules['sub']['instances'];
+
+
+def test_ports_inherit_preceding_declaration():
+    modules = prescan('module m(input [3:0] a, b, output c); endmodule');
+    assert [str(p) for p in modules['m']['ports']] == ['input [3:0] a', 'input [3:0] b', 'output c'];
+
+
+@pytest.mark.parametrize('text', [
+    'module m(a); input a; endmodule',
+    'module m(input my_t a); endmodule',
+    'module m #(parameter type T = int) (); endmodule',
+    'module m(input a [2]); endmodule',
+    "module m; localparam X = 4'd1F; endmodule",
+    'interface i; endinterface',
+    'module m; module n; endmodule endmodule',
+    'module m(input a);',
+    '`define W 8\nmodule m(input [`W-1:0] a); endmodule',
+])
+def test_unsupported(text):
+    with pytest.raises(PrescanUnsupported):
+        Prescanner(text).modules('test.v');
+
+
+def test_prescan_file_falls_back(tmp_path):
+    path = tmp_path / 'test.v';
+    path.write_text('module m(input a); endmodule\n');
+    assert [m['name'] for m in vlog2ipxact.prescan_file(str(path))] == ['m'];
+    path.write_text('module m(a); input a; endmodule\n');
+    assert vlog2ipxact.prescan_file(str(path)) is None;
+    assert vlog2ipxact.prescan_file(str(tmp_path / 'missing.v')) is None;
+
+
+def test_compare_modules():
+    a = prescan('module m #(parameter N = 1) (input [N-1:0] a); sub u (); endmodule');
+    b = prescan('module m #(parameter N = 1) (input [N-1 : 0] a); sub u (); endmodule');
+    assert vlog2ipxact.compare_modules([a['m']], [b['m']]) == [];
+    b = prescan('module m #(parameter N = 2) (output [N-1:0] a); endmodule');
+    diffs = vlog2ipxact.compare_modules([a['m']], [b['m']]);
+    assert [d.split(':')[0] for d in diffs] == ['m ports', 'm parameters', 'm instances'];
+    b = prescan('module n; endmodule');
+    assert len(vlog2ipxact.compare_modules([a['m']], [b['n']])) == 1;
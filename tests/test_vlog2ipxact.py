@@ -0,0 +1,193 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Regression tests run against the syntax tree of a real `verible-verilog-syntax`
+# (skipped when the tool or its Python wrapper are not available).
+
+import sys
+import shutil
+import pathlib
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]));
+
+pytest.importorskip('verible_verilog_syntax');
+import vlog2ipxact
+
+EXECUTABLE = shutil.which('verible-verilog-syntax');
+pytestmark = pytest.mark.skipif(EXECUTABLE is None, reason='`verible-verilog-syntax` not found');
+
+
+def parse_modules(tmp_path, text: str):
+    path = tmp_path / 'test.v';
+    path.write_text(text);
+    parser = vlog2ipxact.verible_verilog_syntax.VeribleVerilogSyntax(executable=EXECUTABLE);
+    data = parser.parse_file(str(path));
+    return {m['name']: m for m in vlog2ipxact.get_modules(data, str(path))};
+
+
+def prescan_modules(tmp_path):
+    return {m['name']: m for m in vlog2ipxact.prescan_file(str(tmp_path / 'test.v'))};
+
+
+def test_named_parameter_overrides(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module top;
+  sub #(.N(4)) u1 ();
+  sub #(.N(8), .W(N * 2)) u2 ();
+  sub #(.N()) u3 ();
+endmodule
+''');
+    expected = [(('N','4'),), (('N','8'),('W','N * 2')), ()];
+    assert modules['top']['overrides'] == expected;
+    assert prescan_modules(tmp_path)['top']['overrides'] == expected;
+
+
+def test_positional_parameter_overrides(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module top;
+  sub #(8, W+1) u1 ();
+  sub #8 u2 ();
+  sub u3 ();
+endmodule
+''');
+    expected = [((0,'8'),(1,'W+1')), ((0,'8'),), ()];
+    assert modules['top']['overrides'] == expected;
+    assert prescan_modules(tmp_path)['top']['overrides'] == expected;
+
+
+def test_non_ansi_ports_skip_instances(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module m (x, y);
+  output x;
+  input y;
+  logic [3:0] y;
+  sub u [3:0] (.x(y));
+  sub x2 (y);
+endmodule
+''');
+    ports = {p.name: p for p in modules['m']['ports']};
+    assert list(ports) == ['x', 'y'];
+    assert (ports['x'].direction, ports['x'].datatype, ports['x'].dimensions) == ('output', None, None);
+    assert (ports['y'].direction, ports['y'].datatype) == ('input', 'logic');
+
+
+def test_non_ansi_port_kinds(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module m (a, b, c, d, e);
+  output reg [7:0] a;
+  output [3:0] b; reg [3:0] b;
+  output wire c;
+  input signed [1:0] d;
+  output logic e;
+endmodule
+module n (output reg [7:0] a, output reg [3:0] b, output wire c, input signed [1:0] d, output logic e);
+endmodule
+''');
+    assert [str(p) for p in modules['m']['ports']] == [str(p) for p in modules['n']['ports']];
+    assert [p.datatype for p in modules['m']['ports']] == ['reg', 'reg', 'wire', None, 'logic'];
+
+
+def test_prescanned_port_types(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module m (input [7:0] a, input wire [3:0] b, input signed [3:0] c, output logic d,
+    input wire signed [2:0] e, input var logic f, output bit signed g);
+endmodule
+''');
+    prescanned = prescan_modules(tmp_path);
+    assert list(vlog2ipxact.compare_modules([prescanned['m']], [modules['m']])) == [];
+    assert [p.datatype for p in prescanned['m']['ports']] == [None, 'wire', None, 'logic', 'wire', 'logic', 'bit signed'];
+
+
+def test_prescan_matches_verible(tmp_path):
+    modules = parse_modules(tmp_path, '''
+`timescale 1ns/1ps
+// module c1;
+module top #(parameter int N = 4, parameter [3:0] W = N*2, parameter S = "module s;") (
+  input  wire clk,
+  input  logic [W-1:0] d [0:0] = '0,
+  output reg signed [7:0] q
+);
+endmodule
+module a #(parameter int N = 4, P = 8'hFF, parameter logic [N-1:0] M = '1) (
+  input  wire clk, rst,
+  input  [N-1:0][1:0] d,
+  output logic [7:0] q
+);
+  localparam L = N + 1;
+  b #(.N(N), .W(L)) u1 (.clk(clk));
+  b #(4) u2 (), u3 ();
+  generate if (N > 2) begin : g
+    c u4 (.*);
+  end endgenerate
+  always_ff @(posedge clk) q <= d;
+endmodule
+module b #(N = 1, W = 2) (input clk);
+endmodule
+''');
+    prescanned = vlog2ipxact.prescan_file(str(tmp_path / 'test.v'));
+    # unpacked port dimensions are left to `verible`
+    assert prescanned is None;
+
+    text = (tmp_path / 'test.v').read_text();
+    (tmp_path / 'test.v').write_text(text.replace(" [0:0] = '0", ''));
+    modules = parse_modules(tmp_path, (tmp_path / 'test.v').read_text());
+    prescanned = vlog2ipxact.prescan_file(str(tmp_path / 'test.v'));
+    assert [m['name'] for m in prescanned] == ['top', 'a', 'b'];
+    assert vlog2ipxact.compare_modules(prescanned, [modules[m['name']] for m in prescanned]) == [];
+
+
+def test_prescan_rejects_malformed_numbers(tmp_path):
+    for text in ["4'b2", "8'o9", "8'd1F"]:
+        with pytest.raises(vlog2ipxact.PrescanUnsupported):
+            vlog2ipxact.Prescanner(f'module m #(parameter P = {text}) (); endmodule');
+
+
+def test_includes_follow_macro_context(tmp_path):
+    (tmp_path / 'h.vh').write_text('`ifdef MODE_A\n`include "a.vh"\n`else\n`include "b.vh"\n`endif\n');
+    (tmp_path / 'defs.vh').write_text('`define USE_Z\n');
+    for name in ['a.vh', 'b.vh', 'z.vh']:
+        (tmp_path / name).write_text('\n');
+    (tmp_path / 'x.v').write_text('`define MODE_A\n`include "h.vh"\nmodule x; endmodule\n');
+    (tmp_path / 'y.v').write_text('`include "h.vh"\n`include "defs.vh"\n`ifdef USE_Z\n`include "z.vh"\n`endif\nmodule y; endmodule\n');
+
+    resolver = vlog2ipxact.IncludeResolver(vlog2ipxact.FileList());
+    includes = lambda f: [pathlib.Path(p).name for p in resolver.includes(str(tmp_path / f))];
+    assert includes('x.v') == ['h.vh', 'a.vh'];
+    assert includes('y.v') == ['h.vh', 'b.vh', 'defs.vh', 'z.vh'];
+
+
+def test_declared_names_and_dimensions(tmp_path):
+    modules = parse_modules(tmp_path, '''
+module m #(parameter pkg::nib_t T = 0, parameter [3:0] M [2] = '{0,1})
+    (input my_t u, output [T-1:0] o, input logic [7:0] a [3]);
+endmodule
+''');
+    assert [p.name for p in modules['m']['parameters']] == ['T', 'M'];
+    assert [str(d) for d in modules['m']['parameters'][1].dimensions] == ['[3:0]'];
+    ports = {p.name: p for p in modules['m']['ports']};
+    assert list(ports) == ['u', 'o', 'a'];
+    assert [str(d) for d in ports['o'].dimensions] == ['[T-1:0]'];
+    assert [str(d) for d in ports['a'].dimensions] == ['[0:3-1]'];
+
+
+def test_includes_relative_to_parent(tmp_path):
+    (tmp_path / 'inc').mkdir();
+    (tmp_path / 'src').mkdir();
+    (tmp_path / 'inc' / 'defs.vh').write_text('\n');
+    (tmp_path / 'inc' / 'abs.vh').write_text('\n');
+    (tmp_path / 'src' / 'x.v').write_text(f'`include "../inc/defs.vh"\n`include "{tmp_path / "inc" / "abs.vh"}"\nmodule x; endmodule\n');
+
+    resolver = vlog2ipxact.IncludeResolver(vlog2ipxact.FileList());
+    assert resolver.includes(str(tmp_path / 'src' / 'x.v')) == [str(tmp_path / 'inc' / 'defs.vh'), str(tmp_path / 'inc' / 'abs.vh')];
@@ -0,0 +1,274 @@
+# Copyright 2023 Tomas Brabec
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Tests of `xactcatalog.py` (no `verible` needed).
+
+import sys
+import pickle
+import subprocess
+import pathlib
+import pytest
+import xml.etree.ElementTree as et
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]));
+
+import xactcatalog
+from xactcatalog import Vlnv
+
+NS = xactcatalog.XactNamespace.ns['ipxact'];
+
+
+def component(path: pathlib.Path, vlnv: str, body: str = ''):
+    v = vlnv.split(':');
+    path.write_text(f'''<?xml version="1.0" encoding="utf-8"?>
+<ipxact:component xmlns:ipxact="{NS}">
+  <ipxact:vendor>{v[0]}</ipxact:vendor>
+  <ipxact:library>{v[1]}</ipxact:library>
+  <ipxact:name>{v[2]}</ipxact:name>
+  <ipxact:version>{v[3]}</ipxact:version>
+  {body}
+</ipxact:component>
+''');
+    return path;
+
+
+# builds a catalog as from the command line `args` (with no directory scan)
+def catalog(args: list, outputDir: str = None, memo: dict = None):
+    opts = xactcatalog.parser.parse_args(args);
+    opts.scanned = [];
+    return xactcatalog.xact_catalog_tree(opts, outputDir, memo);
+
+
+def catalog_files(tree):
+    return [(Vlnv.fromAttributes(e.find('ipxact:vlnv', xactcatalog.XactNamespace.ns)).toList(),
+            e.find('ipxact:name', xactcatalog.XactNamespace.ns).text)
+            for e in tree.getroot().iterfind('ipxact:components/ipxact:ipxactFile', xactcatalog.XactNamespace.ns)];
+
+
+def test_vlnv_value():
+    a = Vlnv(vendor='v', library='l', name='n', version='1.0');
+    b = Vlnv.fromString('v:l:n:1.0');
+    assert a == b and hash(a) == hash(b);
+    assert a != Vlnv.fromString('v:l:n:1.1');
+    assert len({a, b, Vlnv.fromString('v:l:n:1.1')}) == 2;
+    assert pickle.loads(pickle.dumps(a)) == a;
+    assert not Vlnv(vendor='v').isComplete();
+    with pytest.raises(AttributeError):
+        a.name = 'm';
+
+
+def test_duplicate_components(tmp_path):
+    a = component(tmp_path / 'a.xml', 'v:l:a:1.0');
+    b = component(tmp_path / 'b.xml', 'v:l:b:1.0');
+    dup = component(tmp_path / 'dup.xml', 'v:l:a:1.0');
+    tree = catalog([str(a), str(b), str(dup)], str(tmp_path));
+    assert catalog_files(tree) == [(['v','l','a','1.0'], 'a.xml'), (['v','l','b','1.0'], 'b.xml')];
+
+    # components already in an updated catalog are not added again
+    (tmp_path / 'catalog.xml').write_text(et.tostring(tree.getroot(), encoding='unicode'));
+    c = component(tmp_path / 'c.xml', 'v:l:c:1.0');
+    tree = catalog(['--xact', str(tmp_path / 'catalog.xml'), str(dup), str(c)], str(tmp_path));
+    assert [f for _,f in catalog_files(tree)] == ['a.xml', 'b.xml', 'c.xml'];
+
+
+def test_sniff_vlnv(tmp_path):
+    path = component(tmp_path / 'a.xml', 'v:l:a:1.0', '<ipxact:memoryMaps>' + '<ipxact:memoryMap/>'*10000 + '</ipxact:memoryMaps>');
+    assert xactcatalog.sniff_vlnv(path) == (f'{{{NS}}}component', Vlnv.fromString('v:l:a:1.0'));
+
+    # reading stops after the VLNV, i.e. the rest of the file is not parsed
+    text = path.read_text();
+    path.write_text(text[:text.index('<ipxact:memoryMaps>') + 1000]);
+    assert xactcatalog.sniff_vlnv(path, chunkSize=64)[1] == Vlnv.fromString('v:l:a:1.0');
+
+    # missing VLNV elements
+    path.write_text(f'<ipxact:component xmlns:ipxact="{NS}"><ipxact:vendor>v</ipxact:vendor><ipxact:model/></ipxact:component>');
+    assert xactcatalog.sniff_vlnv(path)[1].toList() == ['v', None, None, None];
+
+    # other roots
+    path.write_text(f'<ipxact:catalog xmlns:ipxact="{NS}"><ipxact:vendor>v</ipxact:vendor></ipxact:catalog>');
+    assert xactcatalog.sniff_vlnv(path) == (f'{{{NS}}}catalog', None);
+
+    path.write_text('<ipxact:component');
+    with pytest.raises(et.ParseError):
+        xactcatalog.sniff_vlnv(path);
+
+
+def test_non_components_skipped(tmp_path):
+    a = component(tmp_path / 'a.xml', 'v:l:a:1.0');
+    (tmp_path / 'b.xml').write_text(f'<ipxact:catalog xmlns:ipxact="{NS}"/>');
+    (tmp_path / 'c.xml').write_text('<broken');
+    tree = catalog([str(a), str(tmp_path / 'b.xml'), str(tmp_path / 'c.xml')], str(tmp_path));
+    assert [f for _,f in catalog_files(tree)] == ['a.xml'];
+
+
+def test_jobs_keep_input_order(tmp_path):
+    files = [component(tmp_path / f'{i:02}.xml', f'v:l:c{i}:1.0') for i in range(20)];
+    (tmp_path / 'broken.xml').write_text('<broken');
+    files.insert(5, tmp_path / 'broken.xml');
+    serial = xactcatalog.sniff_components(files, jobs=1);
+    assert [r[:2] for r in xactcatalog.sniff_components(files, jobs=4)] == [r[:2] for r in serial];
+    assert [r[:2] for r in xactcatalog.sniff_components(files, {}, jobs=0)] == [r[:2] for r in serial];
+    assert serial[5][:2] == (None, None) and isinstance(serial[5][2], et.ParseError);
+
+    args = [str(f) for f in files];
+    assert catalog_files(catalog(['--jobs', '4'] + args)) == catalog_files(catalog(args));
+
+
+def test_scan_files(tmp_path):
+    (tmp_path / 'b').mkdir();
+    (tmp_path / 'a').mkdir();
+    for f in ['z.xml', 'a/y.xml', 'b/x.xml', 'b/notes.txt', 'a.xml']:
+        (tmp_path / f).write_text('');
+    (tmp_path / 'b' / 'loop').symlink_to(tmp_path, target_is_directory=True);
+    files = [pathlib.Path(f).relative_to(tmp_path).as_posix() for f in xactcatalog.scan_files(str(tmp_path))];
+    assert files == ['a.xml', 'z.xml', 'a/y.xml', 'b/x.xml'];
+    assert xactcatalog.scan_files(str(tmp_path / 'missing')) == [];
+
+
+def test_scanned_files_after_explicit(tmp_path):
+    (tmp_path / 'ip').mkdir();
+    a = component(tmp_path / 'ip' / 'a.xml', 'v:l:a:1.0');
+    component(tmp_path / 'ip' / 'b.xml', 'v:l:b:1.0');
+    (tmp_path / 'ip' / 'c.xml').write_text(f'<ipxact:design xmlns:ipxact="{NS}"/>');
+    opts = xactcatalog.parser.parse_args([str(a)]);
+    opts.scanned = [pathlib.Path(f) for f in xactcatalog.scan_files(str(tmp_path / 'ip'))];
+    tree = xactcatalog.xact_catalog_tree(opts, str(tmp_path));
+    assert [f for _,f in catalog_files(tree)] == ['ip/a.xml', 'ip/b.xml'];
+
+
+def test_index(tmp_path, monkeypatch):
+    files = [component(tmp_path / f'{i}.xml', f'v:l:c{i}:1.0') for i in range(3)];
+    (tmp_path / 'd.xml').write_text(f'<ipxact:design xmlns:ipxact="{NS}"/>');
+    files.append(tmp_path / 'd.xml');
+    args = [str(f) for f in files];
+    sniffed = [];
+    sniff = xactcatalog.sniff_vlnv;
+    monkeypatch.setattr(xactcatalog, 'sniff_vlnv', lambda path: sniffed.append(pathlib.Path(path).name) or sniff(path));
+
+    def run():
+        index = xactcatalog.CatalogIndex(tmp_path / 'index.db');
+        memo = index.load();
+        tree = catalog(args, str(tmp_path), memo);
+        index.save(memo, set(args));
+        index.close();
+        return catalog_files(tree);
+
+    expected = run();
+    assert sorted(sniffed) == ['0.xml', '1.xml', '2.xml', 'd.xml'];
+
+    # unchanged files come from the index
+    sniffed.clear();
+    assert run() == expected;
+    assert sniffed == [];
+
+    # changed files are read again
+    component(files[1], 'v:l:c1:2.0', '<ipxact:description>changed</ipxact:description>');
+    assert run()[1] == (['v','l','c1','2.0'], '1.xml');
+    assert sniffed == ['1.xml'];
+
+    # entries of deleted files are dropped
+    files[2].unlink();
+    args = args[:2];
+    run();
+    index = xactcatalog.CatalogIndex(tmp_path / 'index.db');
+    assert sorted(pathlib.Path(p).name for p in index.load()) == ['0.xml', '1.xml', 'd.xml'];
+    index.close();
+
+    # indexes of other layout versions are discarded
+    monkeypatch.setattr(xactcatalog.CatalogIndex, 'version', xactcatalog.CatalogIndex.version + 1);
+    index = xactcatalog.CatalogIndex(tmp_path / 'index.db');
+    assert index.load() == {};
+    index.close();
+
+
+def catalog_file(path: pathlib.Path, vlnv: str, sections: dict):
+    v = vlnv.split(':');
+    body = '';
+    for section, entries in sections.items():
+        body += f'<ipxact:{section}>';
+        for ev, name in entries:
+            ev = ev.split(':');
+            body += (f'<ipxact:ipxactFile><ipxact:vlnv vendor="{ev[0]}" library="{ev[1]}" name="{ev[2]}" version="{ev[3]}"/>'
+                f'<ipxact:name>{name}</ipxact:name></ipxact:ipxactFile>');
+        body += f'</ipxact:{section}>';
+    path.write_text(f'''<?xml version="1.0" encoding="utf-8"?>
+<ipxact:catalog xmlns:ipxact="{NS}">
+  <ipxact:vendor>{v[0]}</ipxact:vendor><ipxact:library>{v[1]}</ipxact:library>
+  <ipxact:name>{v[2]}</ipxact:name><ipxact:version>{v[3]}</ipxact:version>
+  {body}
+</ipxact:catalog>
+''');
+    return path;
+
+
+def test_resolve_nested_catalogs(tmp_path, caplog, monkeypatch):
+    (tmp_path / 'sub').mkdir();
+    root = catalog_file(tmp_path / 'root.xml', 'v:l:root:1.0', {
+        'catalogs': [('v:l:sub:1.0', 'sub/sub.xml'), ('v:l:missing:1.0', 'missing.xml')],
+        'components': [('v:l:a:1.0', 'a.xml')]});
+    # `sub` refers back to `root` (a cycle) and to itself
+    catalog_file(tmp_path / 'sub' / 'sub.xml', 'v:l:sub:1.0', {
+        'catalogs': [('v:l:root:1.0', '../root.xml'), ('v:l:sub:1.0', 'sub.xml')],
+        'components': [('v:l:b:1.0', 'b.xml'), ('v:l:a:1.0', 'other/a.xml')],
+        'designs': [('v:l:d:1.0', '/abs/d.xml')]});
+
+    resolver = xactcatalog.CatalogResolver();
+    index = resolver.load(str(root));
+    assert resolver.resolve('v:l:a:1.0') == str(tmp_path / 'a.xml');
+    assert resolver.resolve(Vlnv.fromString('v:l:b:1.0')) == str(tmp_path / 'sub' / 'b.xml');
+    assert resolver.resolve('v:l:d:1.0') == '/abs/d.xml';
+    assert resolver.resolve('v:l:sub:1.0') == str(tmp_path / 'sub' / 'sub.xml');
+    assert resolver.resolve('v:l:c:1.0') is None;
+    with pytest.raises(ValueError):
+        resolver.resolve('v:l:a');
+    assert resolver.catalogs == [str(root), str(tmp_path / 'sub' / 'sub.xml'), str(tmp_path / 'missing.xml')];
+    assert len(index) == 6;
+    assert 'Catalog reference cycle' in caplog.text;
+    assert 'Duplicate VLNV' in caplog.text;
+
+    # catalogs get parsed again only when changed
+    parsed = [];
+    parse = xactcatalog.et.parse;
+    monkeypatch.setattr(xactcatalog.et, 'parse', lambda path: parsed.append(pathlib.Path(path).name) or parse(path));
+    resolver.load(str(root));
+    assert parsed == [];
+    catalog_file(tmp_path / 'sub' / 'sub.xml', 'v:l:sub:1.0', {'components': [('v:l:b:2.0', 'b2.xml')]});
+    resolver.load(str(root));
+    assert parsed == ['sub.xml'];
+    assert resolver.resolve('v:l:b:1.0') is None;
+    assert resolver.resolve('v:l:b:2.0') == str(tmp_path / 'sub' / 'b2.xml');
+
+
+def test_resolve_unreadable_catalog(tmp_path):
+    (tmp_path / 'dir.xml').mkdir();
+    root = catalog_file(tmp_path / 'root.xml', 'v:l:root:1.0', {
+        'catalogs': [('v:l:dir:1.0', 'dir.xml'), ('v:l:broken:1.0', 'broken.xml')],
+        'components': [('v:l:a:1.0', 'a.xml')]});
+    (tmp_path / 'broken.xml').write_text('<broken');
+    resolver = xactcatalog.CatalogResolver();
+    resolver.load(str(root));
+    assert resolver.resolve('v:l:a:1.0') == str(tmp_path / 'a.xml');
+    assert resolver.entries(str(tmp_path / 'dir.xml')) == [];
+    assert resolver.entries(str(tmp_path / 'broken.xml')) == [];
+
+
+def test_resolve_cli(tmp_path):
+    root = catalog_file(tmp_path / 'root.xml', 'v:l:root:1.0', {'components': [('v:l:a:1.0', 'a.xml')]});
+    script = str(pathlib.Path(xactcatalog.__file__));
+    proc = subprocess.run([sys.executable, script, '--xact', str(root), '--resolve', 'v:l:a:1.0'],
+            stdout=subprocess.PIPE, encoding='utf-8');
+    assert proc.returncode == 0 and proc.stdout.split() == [str(tmp_path / 'a.xml')];
+    proc = subprocess.run([sys.executable, script, '--xact', str(root), '--resolve', 'v:l:a:1.0', '--resolve', 'v:l:b:1.0'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, encoding='utf-8');
+    assert proc.returncode == 1 and proc.stdout.split() == [str(tmp_path / 'a.xml')];
@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sys
 import pathlib
 import logging
 import argparse
+import fileWatch
 import xml.etree.ElementTree as et
 from typing import Iterable, Optional, List
 
@@ -193,6 +195,93 @@ def xact_add_view(tree, viewname:str, files:List[pathlib.Path], outputDir:str =
 
     return;
 
+def xact_view_tree(opts, outputDir: str = None):
+    ns = XactNamespace();
+    tree = None;
+    if opts.xact:
+        try:
+            tree = et.parse(str(opts.xact));
+        except (et.ParseError, OSError) as e:
+            # (also a file missing while being replaced, e.g. in watch mode)
+            logging.error(f"Failed to read {opts.xact}: {e}");
+            return None;
+
+    if not tree:
+        # proper IP-XACT 2014 XML namespaces
+        xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
+        'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
+        };
+
+        comp = et.Element(ns.compileTag('component'), xactns);
+
+        # default XML element values (unless relevant options defined
+        # through CLI options)
+        defaults = {'version':'0.0.0', 'name':'manifest'};
+
+        for tag in ['vendor', 'library', 'name', 'version', 'description']:
+            e = et.SubElement(comp, ns.compileTag(tag));
+
+            if hasattr(opts,tag) and getattr(opts,tag) is not None:
+                e.text = str(getattr(opts,tag));
+            elif tag in defaults:
+                e.text = defaults[tag];
+            else:
+                e.text = tag;
+
+        tree = et.ElementTree(comp);
+
+    else:
+        # test if root is an ipxact component
+        comp = tree.getroot();
+        if comp is None or comp.tag != ns.compileTag('component'):
+            logging.error(f'Expecting `ipxact:component` root in {opts.xact}: {comp.tag}');
+            return None;
+
+        # sanity check for required VLNV elements
+        for i,tag in enumerate(['vendor','library','name','version']):
+            fulltag = 'ipxact:'+tag;
+            elem = comp.find(fulltag, XactNamespace.ns);
+            if elem is None:
+                elem = et.Element(ns.compileTag(tag));
+                comp.insert(i,elem);
+                if hasattr(opts,tag) and getattr(opts,tag) is not None:
+                    logging.warning(f'Missing `{fulltag}` element in {opts.xact}!');
+                    elem.text = getattr(opts,tag);
+                else:
+                    logging.error(f'Missing `{fulltag}` element in {opts.xact}!');
+                    elem.text = tag;
+            elif hasattr(opts,tag):
+                attr = getattr(opts,tag);
+                if attr is not None and attr != elem.text:
+                    logging.error(f'User `{fulltag}` element `{attr}` not match `{elem.text}` in {opts.xact}');
+
+        tree = et.ElementTree(comp);
+
+    # add new IP-XACT view
+    xact_add_view( tree, opts.viewname, opts.files, outputDir );
+
+    return tree;
+
+
+def watch(opts, outputDir: str = None):
+    paths = [str(f) for f in opts.files];
+    if opts.xact:
+        paths.append(str(opts.xact));
+
+    # (the existing output counts as the last generated content)
+    last = {};
+
+    def rebuild(changed: List[str]):
+        tree = xact_view_tree(opts, outputDir);
+        if tree is None:
+            return None;
+        _pretty_print(tree.getroot());
+        s = et.tostring(tree.getroot(), encoding='unicode', xml_declaration=True);
+        return [str(opts.output)] if fileWatch.write_output(opts.output, s, last) else [];
+
+    fileWatch.watch(paths, rebuild, opts.interval);
+
+
 parser = argparse.ArgumentParser(description='Adds IP view into IP-XACT 2014.');
 parser.add_argument('-o', '--output', dest='output', required=False, type=pathlib.Path,
         help='IP-XACT output file, stdout if not given.');
@@ -208,6 +297,10 @@ parser.add_argument('--xact-vendor', dest='vendor', required=False, type=str,
         help='IP-XACT component vendor name.');
 parser.add_argument('-n', '--view-name', dest='viewname', required=True, type=str,
         help='IP view name.');
+parser.add_argument('--watch', dest='watch', required=False, action='store_true',
+        help='Keep running and regenerate the output whenever any of the input files changes. Requires `output`.');
+parser.add_argument('--watch-interval', dest='interval', required=False, type=float, default=0.5,
+        help='Polling interval (in seconds) of the watch mode. Defaults to 0.5.');
 parser.add_argument('--rwd', dest='rwd', required=False, type=pathlib.Path,
         help='Relative Working Directory (RWD), which to make file paths relative to. Applies only if `output` not specified.');
 parser.add_argument('--log-level', dest='loglevel', required=False, type=str, default='ERROR',
@@ -274,68 +367,22 @@ for p,u in ns.items():
     logging.debug(f"registering namespace {p}:{u}");
     et.register_namespace(p, u);
 
-ns = XactNamespace();
-tree = None;
-if opts.xact:
-    try:
-        tree = et.parse(str(opts.xact));
-    except et.ParseError as e:
-        logging.error(f"Failed to parse {opts.xact}: {e}");
+if opts.watch:
+    if not opts.output:
+        logging.error('Watch mode requires the `output` option!');
         sys.exit(1);
-
-if not tree:
-    # proper IP-XACT 2014 XML namespaces
-    xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
-    'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
-    };
-
-    comp = et.Element(ns.compileTag('component'), xactns);
-
-    # default XML element values (unless relevant options defined
-    # through CLI options)
-    defaults = {'version':'0.0.0', 'name':'manifest'};
-
-    for tag in ['vendor', 'library', 'name', 'version', 'description']:
-        e = et.SubElement(comp, ns.compileTag(tag));
-
-        if hasattr(opts,tag) and getattr(opts,tag) is not None:
-            e.text = str(getattr(opts,tag));
-        elif tag in defaults:
-            e.text = defaults[tag];
-        else:
-            e.text = tag;
-
-    tree = et.ElementTree(comp);
-
-else:
-    # test if root is an ipxact component
-    comp = tree.getroot();
-    if comp is None or comp.tag != ns.compileTag('component'):
-        logging.error(f'Expecting `ipxact:component` root in {opts.xact}: {comp.tag}');
+    if opts.xact and opts.xact.resolve() == opts.output.resolve():
+        logging.error('Watch mode cannot update the `xact` input in place!');
         sys.exit(1);
-
-    # sanity check for required VLNV elements
-    for i,tag in enumerate(['vendor','library','name','version']):
-        fulltag = 'ipxact:'+tag;
-        elem = comp.find(fulltag, XactNamespace.ns);
-        if elem is None:
-            elem = et.Element(ns.compileTag(tag));
-            comp.insert(i,elem);
-            if hasattr(opts,tag) and getattr(opts,tag) is not None:
-                logging.warning(f'Missing `{fulltag}` element in {opts.xact}!');
-                elem.text = getattr(opts,tag);
-            else:
-                logging.error(f'Missing `{fulltag}` element in {opts.xact}!');
-                elem.text = tag;
-        elif hasattr(opts,tag):
-            attr = getattr(opts,tag);
-            if attr is not None and attr != elem.text:
-                logging.error(f'User `{fulltag}` element `{attr}` not match `{elem.text}` in {opts.xact}');
-
-    tree = et.ElementTree(comp);
-
-# add new IP-XACT view
-xact_add_view( tree, opts.viewname, opts.files, outputDir );
+    try:
+        watch(opts, outputDir);
+    except KeyboardInterrupt:
+        pass;
+    sys.exit(0);
+
+tree = xact_view_tree(opts, outputDir);
+if tree is None:
+    sys.exit(1);
 
 # reformat XML
 _pretty_print(tree.getroot());
@@ -12,14 +12,41 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import annotations
+
+import os
+import re
 import sys
+import mmap
+import heapq
+import bisect
+import itertools
+import shutil
+import json
+import pickle
+import hashlib
+import tempfile
+import subprocess
 import pathlib
 import anytree
 import logging
 import argparse
-import verible_verilog_syntax
+import concurrent.futures
+import fileWatch
 import xml.etree.ElementTree as et
-from typing import Iterable, Optional, List
+from typing import List
+
+# Parsing needs the Verible's Python wrapper. The rest of the module (e.g.
+# constant evaluation or the pre-scanner) works without it.
+try:
+    import verible_verilog_syntax
+except ImportError:
+    verible_verilog_syntax = None;
+
+try:
+    import ijson
+except ImportError:
+    ijson = None;
 
 # https://stackoverflow.com/a/65808327
 def _pretty_print(current, parent=None, index=-1, depth=0, indent='  '):
@@ -33,33 +60,100 @@ def _pretty_print(current, parent=None, index=-1, depth=0, indent='  '):
         if index == len(parent) - 1:
             current.tail = '\n' + (indent * (depth - 1))
 
-# Declaring own SyntaxTree iterator that can search only
-# within a certain depth of the tree.
-class PreOrderDepthTreeIterator(verible_verilog_syntax._TreeIteratorBase):
-  def __init__(self, tree: "Node",
-               filter_: Optional[verible_verilog_syntax.CallableFilter] = None,
-               reverse_children: bool = False,
-               depth: int = -1):
-    self.tree = tree
-    self.reverse_children = reverse_children
-    self.filter_ = filter_ if filter_ else lambda n: True
-    self.depth = depth
-
-  def _iter_tree_depth(self, tree: Optional["Node"], depth=-1) -> Iterable["Node"]:
-    if self.filter_(tree):
-      yield tree
-    elif depth < 0 or depth > 0:
-      if depth > 0: depth -= 1;
-      for child in self._iter_children(tree):
-        yield from self._iter_tree_depth(child,depth)
-
-  def _iter_tree(self, tree: Optional["Node"]) -> Iterable["Node"]:
-    yield from self._iter_tree_depth(tree, self.depth)
+# Indexes nodes of a syntax (sub)tree by their tags, walking the tree just
+# once. Nodes are kept in the pre-order, which makes any subtree a contiguous
+# range of node positions and hence allows to search within a subtree.
+class TagIndex(object):
+
+    # `prune` lists tags whose subtrees shall not be indexed (the nodes with
+    # these tags are indexed, their descendants are not)
+    def __init__(self, tree: "Node", prune: set = None):
+        # nodes in the pre-order
+        self.nodes = [];
+
+        # position past the last descendant of each node
+        self.ends = [];
+
+        # nesting level of each node (0 for `tree`)
+        self.depths = [];
+
+        # tag -> ordered list of node positions
+        self.tags = {};
+
+        # `id(node)` -> node position
+        self.positions = {};
+
+        stack = [tree];
+        depth = 0;
+        while len(stack) > 0:
+            n = stack.pop();
+
+            # end of a subtree
+            if isinstance(n, int):
+                self.ends[n] = len(self.nodes);
+                depth -= 1;
+                continue;
+
+            pos = len(self.nodes);
+            self.nodes.append(n);
+            self.ends.append(None);
+            self.depths.append(depth);
+            self.positions[id(n)] = pos;
+
+            tag = getattr(n, 'tag', None);
+            if tag is not None:
+                self.tags.setdefault(tag, []).append(pos);
+
+            stack.append(pos);
+            depth += 1;
+            if prune and tag in prune:
+                continue;
+            children = getattr(n, 'children', None);
+            if children:
+                stack.extend(reversed(children));
+
+    def iter_find_all(self, tags, within: "Node" = None):
+        if isinstance(tags, str):
+            tags = [tags];
+
+        lo, hi = 0, len(self.nodes);
+        if within is not None:
+            lo = self.positions[id(within)];
+            hi = self.ends[lo];
+
+        ranges = [];
+        for tag in tags:
+            l = self.tags.get(tag);
+            if not l:
+                continue;
+            i = bisect.bisect_left(l, lo);
+            j = bisect.bisect_left(l, hi);
+            if i < j:
+                ranges.append( itertools.islice(l, i, j) );
+
+        for pos in heapq.merge(*ranges):
+            yield self.nodes[pos];
+
+    def find_all(self, tags, within: "Node" = None):
+        return list(self.iter_find_all(tags, within));
+
+    def find(self, tags, within: "Node" = None):
+        return next(self.iter_find_all(tags, within), None);
+
+    def depth(self, node: "Node"):
+        return self.depths[self.positions[id(node)]];
+
+    # returns the range of node positions of the subtree under `node`
+    def span(self, node: "Node"):
+        pos = self.positions[id(node)];
+        return (pos, self.ends[pos]);
 
 
 class XactNamespace(object):
 
-    ns = {'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014"};
+    ns = {'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014",
+    'vlog2ipxact':"https://github.com/brabect1/ipxact-manifest-utils"
+    };
 
     def __init__(self, ns = None):
         self.ns = ns;
@@ -82,8 +176,18 @@ class XactNamespace(object):
         return tag;
 
 
+# annotates an IP-XACT expression element `e` with the evaluated `value` of
+# its expression (see `--evaluate`) as a `vlog2ipxact:value` attribute, the
+# element text keeping the expression
+def xact_set_value(e: et.Element, value):
+    if value is not None and str(value) != (e.text or '').strip():
+        e.set(XactNamespace().compileTag('value', 'vlog2ipxact'), str(value));
+
+
 class TypeDimension(object):
 
+    __slots__ = ('left', 'right');
+
     def __init__(self, left, right):
         self.left = left;
         self.right = right;
@@ -91,12 +195,26 @@ class TypeDimension(object):
     def __str__(self):
         return '['+str(self.left)+':'+str(self.right)+']';
 
-    def etXact(self):
-        vector = et.Element('ipxact:vector');
-        left = et.SubElement(vector, 'ipxact:left');
+    def __eq__(self, other):
+        if not isinstance(other, TypeDimension):
+            return NotImplemented;
+        return self.left == other.left and self.right == other.right;
+
+    def __hash__(self):
+        return hash((self.left, self.right));
+
+    # with `env` (see `ParameterEnv`), bounds get annotated with their
+    # values where evaluable
+    def etXact(self, env=None):
+        ns = XactNamespace();
+        vector = et.Element(ns.compileTag('vector'));
+        left = et.SubElement(vector, ns.compileTag('left'));
         left.text = self.left;
-        right = et.SubElement(vector, 'ipxact:right');
+        right = et.SubElement(vector, ns.compileTag('right'));
         right.text = self.right;
+        if env:
+            xact_set_value(left, env.evaluate(self.left));
+            xact_set_value(right, env.evaluate(self.right));
         return vector;
 
 
@@ -104,22 +222,27 @@ class Port(object):
 
     attrs = ['direction', 'datatype', 'dimensions', 'name'];
 
+    __slots__ = ('direction', 'datatype', 'dimensions', 'name');
+
     lutDirection = {'input': 'in', 'output': 'out', 'inout': 'inout'};
 
-    def __init__(self, name, **kwargs):
+    def __init__(self, name, direction=None, datatype=None, dimensions=None):
+        # strings repeating across many ports get interned
         self.name = name;
+        self.direction = sys.intern(direction) if direction else 'input';
+        self.datatype = sys.intern(datatype) if datatype else datatype;
+        self.dimensions = tuple(dimensions) if dimensions is not None else None;
 
-        for attr in Port.attrs:
-            if hasattr(self,attr):
-                continue;
+    def _key(self):
+        return (self.name, self.direction, self.datatype, self.dimensions);
 
-            if attr in kwargs:
-                setattr(self,attr,kwargs[attr]);
-            else:
-                setattr(self,attr,None);
+    def __eq__(self, other):
+        if not isinstance(other, Port):
+            return NotImplemented;
+        return self._key() == other._key();
 
-        if self.direction is None:
-            self.direction = 'input';
+    def __hash__(self):
+        return hash(self._key());
 
     def __str__(self):
         attrs = [];
@@ -135,7 +258,7 @@ class Port(object):
 
         return ' '.join(attrs);
 
-    def etXact(self):
+    def etXact(self, env=None):
         ns = XactNamespace();
         p = et.Element(ns.compileTag('port'));
 
@@ -154,7 +277,7 @@ class Port(object):
         if self.dimensions and len(self.dimensions) > 0:
             vectors= et.SubElement(signal, ns.compileTag('vectors'));
             for dimension in self.dimensions:
-                vectors.append(dimension.etXact());
+                vectors.append(dimension.etXact(env));
 
         if self.datatype:
             wiredefs = et.SubElement(signal, ns.compileTag('wireTypeDefs'));
@@ -169,17 +292,24 @@ class Parameter(object):
 
     attrs = ['datatype', 'dimensions', 'name', 'value'];
 
-    def __init__(self, name, **kwargs):
+    __slots__ = ('datatype', 'dimensions', 'name', 'value');
+
+    def __init__(self, name, datatype=None, dimensions=None, value=None):
         self.name = name;
+        self.datatype = sys.intern(datatype) if datatype else datatype;
+        self.dimensions = tuple(dimensions) if dimensions is not None else None;
+        self.value = value;
 
-        for attr in Parameter.attrs:
-            if hasattr(self,attr):
-                continue;
+    def _key(self):
+        return (self.name, self.datatype, self.dimensions, self.value);
 
-            if attr in kwargs:
-                setattr(self,attr,kwargs[attr]);
-            else:
-                setattr(self,attr,None);
+    def __eq__(self, other):
+        if not isinstance(other, Parameter):
+            return NotImplemented;
+        return self._key() == other._key();
+
+    def __hash__(self):
+        return hash(self._key());
 
     def __str__(self):
         attrs = [];
@@ -198,7 +328,7 @@ class Parameter(object):
 
         return ' '.join(attrs);
 
-    def etXact(self, elementTag='moduleParameter'):
+    def etXact(self, elementTag='moduleParameter', env=None):
         ns = XactNamespace();
         p = et.Element(ns.compileTag(elementTag));
 
@@ -206,8 +336,11 @@ class Parameter(object):
         name.text = self.name;
 
         value = et.SubElement(p, ns.compileTag('value'));
-        if hasattr(self,'value') and self.value:
+        if self.value:
             value.text = str(self.value);
+            if env:
+                # the value converted to the parameter type
+                xact_set_value(value, env.parameter(self.name));
         else:
             # use the parameter name as "symolic" value
             value.text = self.name;
@@ -218,365 +351,2418 @@ class Parameter(object):
         return p;
 
 
-def get_instances(module_data: verible_verilog_syntax.SyntaxData):
+# Pratt parser and evaluator of Verilog constant integer expressions (as
+# found in parameter values and dimensions). Values are `(value, width,
+# signed)` tuples, the value being truncated to the width (and negative only
+# if signed). Expressions evaluate by the Verilog sizing rules: unsized
+# numbers are 32 bits wide, context-determined operands get extended to the
+# width of the expression, and results wrap around within it. Parsed
+# expressions are cached by their text; unsupported expressions (e.g. real
+# numbers, `x`/`z` digits, unknown functions) evaluate to `None`.
+class ConstExpr(object):
+
+    class Unsupported(Exception):
+        pass;
+
+    token = re.compile(r"""
+        (?P<ws>\s+)|
+        (?P<based>(\d[\d_]*)?\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-F_]+\b)|
+        (?P<number>\d[\d_]*(?![\w.']))|
+        (?P<ident>\$?[a-zA-Z_][\w$]*)|
+        (?P<op>===|!==|<<<|>>>|\*\*|==|!=|<=|>=|<<|>>|&&|\|\||~\^|\^~|[-+*/%<>!~&|^?:(),])
+        """, re.X);
+
+    bases = {'b':2, 'o':8, 'd':10, 'h':16};
+
+    # binding powers of binary operators
+    binary = {'||':2, '&&':3, '|':4, '^':5, '~^':5, '^~':5, '&':6, '==':7, '!=':7, '===':7, '!==':7,
+        '<':8, '<=':8, '>':8, '>=':8, '<<':9, '>>':9, '<<<':9, '>>>':9, '+':10, '-':10, '*':11, '/':11, '%':11,
+        '**':12};
+
+    # operators of 1-bit results with operands sized among themselves
+    relational = frozenset(['==', '!=', '===', '!==', '<', '<=', '>', '>=']);
+
+    # operators of the left operand size (the right one being self-determined)
+    shifts = frozenset(['<<', '>>', '<<<', '>>>', '**']);
+
+    functions = frozenset(['$clog2', '$signed', '$unsigned']);
+
+    # bit width limit of values (a guard against huge literals)
+    maxBits = 4096;
+
+    parsed = {};
+    maxParsed = 65536;
+
+    def __init__(self, text: str):
+        self.tokens = [];
+        pos = 0;
+        for m in ConstExpr.token.finditer(text):
+            if m.start() != pos:
+                raise ConstExpr.Unsupported(text[pos:m.start()]);
+            pos = m.end();
+            kind = m.lastgroup;
+            if kind == 'ws':
+                continue;
+            elif kind == 'based':
+                size, rest = m.group(0).split("'", 1);
+                size = size.strip().replace('_','');
+                signed = rest[0] in 'sS';
+                rest = rest.lstrip('sS').strip();
+                base = ConstExpr.bases[rest[0].lower()];
+                value = int(rest[1:].strip().replace('_',''), base);
+                if not size:
+                    # unsized based numbers are (at least) 32 bits wide
+                    if value >> 32:
+                        raise ConstExpr.Unsupported(m.group(0));
+                    size = 32;
+                size = int(size);
+                if size == 0 or size > ConstExpr.maxBits:
+                    raise ConstExpr.Unsupported(m.group(0));
+                # sized numbers get truncated to their size
+                self.tokens.append( ('const', (ConstExpr.truncate(value, size, signed), size, signed)) );
+            elif kind == 'number':
+                value = int(m.group(0).replace('_',''));
+                if value >> 31:
+                    raise ConstExpr.Unsupported(m.group(0));
+                self.tokens.append( ('const', (value, 32, True)) );
+            else:
+                self.tokens.append( (kind, m.group(0)) );
+        if pos != len(text):
+            raise ConstExpr.Unsupported(text[pos:]);
+        self.tokens.append( ('eof', None) );
+        self.pos = 0;
+
+    def next(self):
+        t = self.tokens[self.pos];
+        self.pos += 1;
+        return t;
+
+    def peek(self):
+        return self.tokens[self.pos];
+
+    def expect(self, op: str):
+        if self.next() != ('op', op):
+            raise ConstExpr.Unsupported(op);
+
+    def expression(self, rbp: int = 0):
+        left = self.prefix();
+        while True:
+            kind, op = self.peek();
+            if kind != 'op':
+                break;
+            if op == '?' and rbp < 1:
+                self.next();
+                a = self.expression();
+                self.expect(':');
+                # right associative
+                b = self.expression(0);
+                left = ('?', left, a, b);
+                continue;
+            lbp = ConstExpr.binary.get(op, 0);
+            if lbp <= rbp:
+                break;
+            self.next();
+            # `**` is right associative
+            right = self.expression(lbp-1 if op == '**' else lbp);
+            left = (op, left, right);
+        return left;
+
+    def prefix(self):
+        kind, v = self.next();
+        if kind == 'const':
+            return (kind, v);
+        if kind == 'ident':
+            if self.peek() == ('op', '('):
+                self.next();
+                args = [self.expression()];
+                while self.peek() == ('op', ','):
+                    self.next();
+                    args.append(self.expression());
+                self.expect(')');
+                return ('call', v, args);
+            return ('id', v);
+        if kind == 'op' and v == '(':
+            e = self.expression();
+            self.expect(')');
+            return e;
+        if kind == 'op' and v in ['-', '+', '!', '~']:
+            return ('unary', v, self.expression(13));
+        raise ConstExpr.Unsupported(str(v));
+
+    # returns the parsed expression tree (memoized) or `None`
+    @staticmethod
+    def parse(text: str):
+        if text in ConstExpr.parsed:
+            return ConstExpr.parsed[text];
+        try:
+            p = ConstExpr(text);
+            tree = p.expression();
+            if p.peek()[0] != 'eof':
+                raise ConstExpr.Unsupported(str(p.peek()[1]));
+        except (ConstExpr.Unsupported, ValueError):
+            # (`ValueError` for digits invalid in the base, e.g. `8'd1F`)
+            tree = None;
+        # bound the memory use of long running (watch) sessions
+        if len(ConstExpr.parsed) >= ConstExpr.maxParsed:
+            ConstExpr.parsed.clear();
+        ConstExpr.parsed[text] = tree;
+        return tree;
+
+    # returns `value` truncated to `width` bits (in two's complement if
+    # `signed`)
+    @staticmethod
+    def truncate(value: int, width: int, signed: bool):
+        value &= (1 << width) - 1;
+        if signed and value >> (width - 1):
+            value -= 1 << width;
+        return value;
+
+    # returns `value` of `width` bits extended to the expression `width` and
+    # signedness it is an operand of (sign extended only if signed)
+    @staticmethod
+    def extend(value: int, valueWidth: int, width: int, signed: bool):
+        if not signed:
+            value &= (1 << valueWidth) - 1;
+        return ConstExpr.truncate(value, width, signed);
+
+    # returns the self-determined `(width, signed)` of `tree`
+    @staticmethod
+    def size(tree, env: dict):
+        kind = tree[0];
+        if kind == 'const':
+            return tree[1][1:];
+        if kind == 'id':
+            v = env.get(tree[1]);
+            if v is None:
+                raise ConstExpr.Unsupported(tree[1]);
+            return v[1:];
+        if kind == 'call':
+            if tree[1] not in ConstExpr.functions or len(tree[2]) != 1:
+                raise ConstExpr.Unsupported(tree[1]);
+            if tree[1] == '$clog2':
+                return (32, True);
+            return (ConstExpr.size(tree[2][0], env)[0], tree[1] == '$signed');
+        if kind == 'unary':
+            return (1, False) if tree[1] == '!' else ConstExpr.size(tree[2], env);
+        if kind == '?':
+            a, b = ConstExpr.size(tree[2], env), ConstExpr.size(tree[3], env);
+        elif kind in ConstExpr.relational or kind in ['&&', '||']:
+            return (1, False);
+        elif kind in ConstExpr.shifts:
+            return ConstExpr.size(tree[1], env);
+        else:
+            a, b = ConstExpr.size(tree[1], env), ConstExpr.size(tree[2], env);
+        # unsigned if any operand unsigned
+        return (max(a[0], b[0]), a[1] and b[1]);
+
+    # returns the value of `tree` evaluated in the scope of `env` (names to
+    # `(value, width, signed)`) as an expression of `width` and `signed`
+    @staticmethod
+    def evaluate(tree, env: dict, width: int, signed: bool):
+        kind = tree[0];
+        if kind == 'const' or kind == 'id':
+            v = tree[1] if kind == 'const' else env.get(tree[1]);
+            if v is None:
+                raise ConstExpr.Unsupported(tree[1]);
+            return ConstExpr.extend(v[0], v[1], width, signed);
+        if kind == 'call':
+            if tree[1] not in ConstExpr.functions or len(tree[2]) != 1:
+                raise ConstExpr.Unsupported(tree[1]);
+            w, s = ConstExpr.size(tree[2][0], env);
+            a = ConstExpr.evaluate(tree[2][0], env, w, s);
+            if tree[1] == '$clog2':
+                # the argument is treated as unsigned
+                a &= (1 << w) - 1;
+                return ConstExpr.extend(0 if a <= 1 else (a-1).bit_length(), 32, width, signed);
+            return ConstExpr.extend(ConstExpr.truncate(a, w, tree[1] == '$signed'), w, width, signed);
+        if kind == 'unary':
+            if tree[1] == '!':
+                a = ConstExpr.evaluate(tree[2], env, *ConstExpr.size(tree[2], env));
+                return ConstExpr.extend(int(not a), 1, width, signed);
+            a = ConstExpr.evaluate(tree[2], env, width, signed);
+            return ConstExpr.truncate({'-': -a, '+': a, '~': ~a}[tree[1]], width, signed);
+        if kind == '?':
+            c = ConstExpr.evaluate(tree[1], env, *ConstExpr.size(tree[1], env));
+            return ConstExpr.evaluate(tree[2] if c else tree[3], env, width, signed);
+
+        op = kind;
+        if op in ['&&', '||']:
+            # short-circuit logical operators
+            a = ConstExpr.evaluate(tree[1], env, *ConstExpr.size(tree[1], env));
+            if bool(a) == (op == '||'):
+                return int(bool(a));
+            return int(bool(ConstExpr.evaluate(tree[2], env, *ConstExpr.size(tree[2], env))));
+        if op in ConstExpr.relational:
+            a, b = ConstExpr.size(tree[1], env), ConstExpr.size(tree[2], env);
+            w, s = max(a[0], b[0]), a[1] and b[1];
+            a, b = ConstExpr.evaluate(tree[1], env, w, s), ConstExpr.evaluate(tree[2], env, w, s);
+            return int({'==': a == b, '!=': a != b, '===': a == b, '!==': a != b,
+                '<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b}[op]);
+
+        a = ConstExpr.evaluate(tree[1], env, width, signed);
+        if op in ConstExpr.shifts:
+            w, s = ConstExpr.size(tree[2], env);
+            b = ConstExpr.evaluate(tree[2], env, w, s);
+            if op == '**':
+                if b < 0:
+                    if a == 0:
+                        raise ConstExpr.Unsupported('zero to a negative power');
+                    r = a if abs(a) == 1 and b % 2 else int(abs(a) == 1);
+                else:
+                    r = pow(a, b, 1 << width);
+                return ConstExpr.truncate(r, width, signed);
+            # the shift amount is treated as unsigned
+            b = min(b & ((1 << w) - 1), width);
+            if op in ['<<', '<<<']:
+                return ConstExpr.truncate(a << b, width, signed);
+            if op == '>>' or not signed:
+                a &= (1 << width) - 1;
+            return ConstExpr.truncate(a >> b, width, signed);
+
+        b = ConstExpr.evaluate(tree[2], env, width, signed);
+        if op in ['/', '%']:
+            if b == 0:
+                raise ConstExpr.Unsupported('division by zero');
+            # integer division truncates towards zero
+            q = abs(a) // abs(b);
+            q = q if (a < 0) == (b < 0) else -q;
+            return ConstExpr.truncate(q if op == '/' else a - b*q, width, signed);
+        return ConstExpr.truncate({
+            '+': lambda: a+b, '-': lambda: a-b, '*': lambda: a*b,
+            '&': lambda: a & b, '|': lambda: a | b, '^': lambda: a ^ b, '~^': lambda: ~(a ^ b), '^~': lambda: ~(a ^ b),
+        }[op](), width, signed);
+
+    # returns `(value, width, signed)` of `tree`, evaluated as assigned to
+    # a value of `width` and `signed` (where given, otherwise by the self
+    # determined ones of `tree`)
+    @staticmethod
+    def value(tree, env: dict, width: int = None, signed: bool = None):
+        w, s = ConstExpr.size(tree, env);
+        if max(w, width or 0) > ConstExpr.maxBits:
+            raise ConstExpr.Unsupported('value too wide');
+        v = ConstExpr.evaluate(tree, env, max(w, width or 0), s);
+        width = width or w;
+        signed = s if signed is None else signed;
+        return (ConstExpr.truncate(v, width, signed), width, signed);
+
+
+# Values of module parameters (defaults, optionally overridden) and memoized
+# evaluation of constant expressions in their scope. Parameters take their
+# declared type (e.g. `int`, `bit signed [3:0]`, or just a range), untyped
+# ones the type of their value; parameters of other types (e.g. `real` or
+# user defined types) have no value. Environments get shared by all users of
+# the same parameters and overrides (see `get()`).
+class ParameterEnv(object):
+
+    __slots__ = ('values', 'memo');
+
+    envs = {};
+    maxEnvs = 4096;
+
+    # `(width, signed)` of data types, the width of vector types (`None`)
+    # given by their dimensions
+    types = {'byte': (8, True), 'shortint': (16, True), 'int': (32, True), 'integer': (32, True),
+        'longint': (64, True), 'time': (64, False), 'bit': (None, False), 'logic': (None, False),
+        'reg': (None, False)};
+
+    # `overrides` map parameter names to value expressions
+    def __init__(self, parameters: List[Parameter] = None, overrides: dict = None):
+        # parameter names to `(value, width, signed)` (see `ConstExpr`)
+        self.values = {};
+        self.memo = {};
+        for p in (parameters or []):
+            value = p.value;
+            if overrides and p.name in overrides:
+                value = overrides[p.name];
+            # defaults may refer to preceding parameters
+            value = ConstExpr.parse(value) if isinstance(value, str) else None;
+            if value is not None:
+                try:
+                    value = ConstExpr.value(value, self.values, *self.type(p));
+                except (ConstExpr.Unsupported, OverflowError, MemoryError):
+                    value = None;
+            self.values[p.name] = value;
+
+    # returns `(width, signed)` of the values of `p` (`None` for those taken
+    # from the value)
+    def type(self, p: Parameter):
+        words = (p.datatype or '').split();
+        signing = [w for w in words if w in ['signed', 'unsigned']];
+        words = [w for w in words if w not in ['signed', 'unsigned']];
+        if len(words) > 1 or (words and words[0] not in ParameterEnv.types):
+            raise ConstExpr.Unsupported(p.datatype);
+
+        width, signed = ParameterEnv.types[words[0]] if words else (None, None);
+        if p.dimensions:
+            if width is not None:
+                raise ConstExpr.Unsupported(p.datatype);
+            width = self.width(p.dimensions);
+            if width is None:
+                raise ConstExpr.Unsupported(str(p.dimensions[0]));
+            signed = signed or False;
+        elif words and width is None:
+            width = 1;
+        if signing:
+            signed = signing[-1] == 'signed';
+        return (width, signed);
+
+    @staticmethod
+    def get(parameters: List[Parameter] = None, overrides: dict = None):
+        key = (tuple(parameters or []), frozenset((overrides or {}).items()));
+        env = ParameterEnv.envs.get(key);
+        if env is None:
+            # bound the memory use of long running (watch) sessions
+            if len(ParameterEnv.envs) >= ParameterEnv.maxEnvs:
+                ParameterEnv.envs.clear();
+            env = ParameterEnv(parameters, overrides);
+            ParameterEnv.envs[key] = env;
+        return env;
+
+    # returns the integer value of `expr` or `None`
+    def evaluate(self, expr):
+        if expr is None or isinstance(expr, int):
+            return expr;
+        if expr in self.memo:
+            return self.memo[expr];
+        tree = ConstExpr.parse(expr);
+        value = None;
+        if tree is not None:
+            try:
+                value = ConstExpr.value(tree, self.values)[0];
+            except (ConstExpr.Unsupported, OverflowError, MemoryError):
+                value = None;
+        self.memo[expr] = value;
+        return value;
+
+    # returns the integer value of parameter `name` or `None`
+    def parameter(self, name: str):
+        v = self.values.get(name);
+        return v[0] if v is not None else None;
+
+    # returns `(left, right)` integer bounds of a dimension (`None` where not
+    # evaluable)
+    def dimension(self, dim: TypeDimension):
+        return (self.evaluate(dim.left), self.evaluate(dim.right));
+
+    # returns the number of bits of `dimensions` (1 for none) or `None`
+    def width(self, dimensions):
+        w = 1;
+        for d in (dimensions or []):
+            l, r = self.dimension(d);
+            if l is None or r is None:
+                return None;
+            w *= abs(l - r) + 1;
+        return w;
+
+
+# returns source text spanning `nodes` (with whitespace normalized)
+def get_span_text(nodes):
+    nodes = [n for n in nodes if n is not None and n.start is not None];
+    if not nodes:
+        return '';
+    text = nodes[0].syntax_data.source_code[nodes[0].start:nodes[-1].end];
+    if isinstance(text, (bytes, mmap.mmap)):
+        text = bytes(text).decode('utf-8', errors='replace');
+    return ' '.join(text.split());
+
+
+# returns parameter overrides of an instantiation type (`#(...)`) as a tuple
+# of `(name, value)` items, where `name` is the parameter position for
+# overrides by order; empty named overrides (`.name()`) are skipped
+def get_parameter_overrides(insttype: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    plist = index.find(['kActualParameterList'], within=insttype);
+    if plist is None:
+        return ();
+
+    overrides = [];
+    named = False;
+    for p in index.iter_find_all(['kParamByName'], within=plist):
+        named = True;
+        name = index.find(['SymbolIdentifier', 'EscapedIdentifier'], within=p);
+        # `.name(value)`, the value being in a `kParenGroup`
+        value = next((c for c in p.children if getattr(c, 'tag', None) == 'kParenGroup'), None);
+        value = get_span_text(value.children[1:-1]) if value is not None else '';
+        if value:
+            overrides.append( (name.text if name else None, value) );
+    if named:
+        return tuple(overrides);
+
+    positional = index.find(['kActualParameterPositionalList'], within=plist);
+    if positional is not None:
+        items = [[]];
+        for c in positional.children:
+            if getattr(c, 'tag', None) == ',':
+                items.append([]);
+            else:
+                items[-1].append(c);
+    else:
+        # `#value`
+        items = [[c for c in plist.children if getattr(c, 'tag', None) not in ['#', '(', ')']]];
+    return tuple((i, get_span_text(item)) for i,item in enumerate(items) if item);
+
+
+# returns a list of instantiated module names (one per instantiation), or
+# with `counts` a dictionary of unique module names and instance counts;
+# parameter overrides of the instantiations get appended to `overrides` (if
+# given)
+def get_instances(module_data: verible_verilog_syntax.SyntaxData, index: TagIndex = None, counts: bool = False,
+        overrides: list = None):
+    if index is None:
+        index = TagIndex(module_data);
+
     insts = None;
-    for inst in module_data.iter_find_all({"tag": ["kInstantiationBase"]}):
-        instname = inst.find({"tag": ["kGateInstance"]});
-        if not instname: continue;
+    for inst in index.iter_find_all(["kInstantiationBase"], within=module_data):
+        if counts:
+            n = sum(1 for _ in index.iter_find_all(["kGateInstance"], within=inst));
+            if n == 0: continue;
+        else:
+            instname = index.find(["kGateInstance"], within=inst);
+            if not instname: continue;
 
-        insttype = inst.find({"tag": ["kInstantiationType"]});
+        insttype = index.find(["kInstantiationType"], within=inst);
         if insttype:
-            modulename = insttype.find({"tag": ["kUnqualifiedId"]});
+            modulename = index.find(["kUnqualifiedId"], within=insttype);
             if not modulename: continue;
 
             if len(modulename.children) > 0 and hasattr(modulename.children[0],'tag') and modulename.children[0].tag == 'SymbolIdentifier':
                 name = modulename.children[0].text;
-                if not insts: insts = [];
-                insts.append(name);
+                if counts:
+                    if not insts: insts = {};
+                    insts[name] = insts.get(name, 0) + n;
+                else:
+                    if not insts: insts = [];
+                    insts.append(name);
+                    if overrides is not None:
+                        overrides.append( get_parameter_overrides(insttype, index) );
 
     return insts;
 
-def get_parameters(module_data: verible_verilog_syntax.SyntaxData):
+def get_dimensions(decl: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    # the least nested dimensions (e.g. unpacked ones of a port over its
+    # packed data type dimensions)
+    declDimensions = min(index.iter_find_all(['kDeclarationDimensions'], within=decl), key=index.depth, default=None);
+    if not declDimensions:
+        return None;
+
+    dimensions = [];
+    for declDimension in index.iter_find_all(['kDimensionRange','kDimensionScalar'], within=declDimensions):
+        if declDimension.tag == 'kDimensionRange':
+            dimensionRange = [c for c in declDimension.children if getattr(c, 'tag', None) == 'kExpression'];
+            left = dimensionRange[0].text;
+            right = dimensionRange[1].text;
+            dimensions.append( TypeDimension(left,right) );
+        elif declDimension.tag == 'kDimensionScalar':
+            size = index.find(['kExpressionList'], within=declDimension);
+            if size:
+                dimensions.append( TypeDimension('0',size.text+'-1') );
+    return tuple(dimensions);
+
+
+def get_parameter_declaration(paramDecl: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    dimensions = get_dimensions(paramDecl, index);
+
+    datatype = index.find(['kTypeInfo'], within=paramDecl);
+    if datatype:
+        datatype = datatype.text;
+        if len(datatype) == 0:
+            datatype = None;
+    else:
+        if hasattr(paramDecl.children[1], 'tag'):
+            datatype = paramDecl.children[1].text;
+        else:
+            datatype = None;
+
+    value = index.find(['kTrailingAssign'], within=paramDecl);
+    if value:
+        value = index.find(['kExpression'], within=value);
+        if value:
+            value = value.text;
+
+    return (datatype, dimensions, value);
+
+
+def get_parameters(module_data: verible_verilog_syntax.SyntaxData, index: TagIndex = None):
+    if index is None:
+        index = TagIndex(module_data);
+
     params = [];
 
-    paramlist = module_data.find({"tag": ["kFormalParameterList"]});
+    paramlist = index.find(["kFormalParameterList"], within=module_data);
     if not paramlist:
         return params;
 
-    lastParamDecl = None;
-    for param in paramlist.iter_find_all({"tag": ["kParamDeclaration"]}):
-        if param.tag == 'kParamDeclaration':
-            lastParamDecl = param;
-
-        name = param.find({"tag": ["kUnqualifiedId", "SymbolIdentifier", "EscapedIdentifier"]});
+    # assignments continuing a declaration (e.g. `P` in `parameter int N = 4,
+    # P = 8`) come as separate declarations with neither the keyword nor
+    # a type; they share the type of the preceding declaration
+    datatype, dimensions = None, None;
+    for param in index.iter_find_all(["kParamDeclaration"], within=paramlist):
+        declType, declDimensions, value = get_parameter_declaration(param, index);
+        keyword = param.children[0] is not None and param.children[0].text in ['parameter', 'localparam'];
+        if keyword or declType or declDimensions:
+            datatype, dimensions = declType, declDimensions;
+
+        name = get_declared_names(param, index);
         if name:
-            name = name.text;
+            name = name[0];
         else:
             name = 'undefined_port';
 
-        dimensions = None;
-        datatype = None;
-        value = None;
+        params.append( Parameter(name, datatype=datatype, dimensions=dimensions, value=value) );
 
-        if lastParamDecl:
-            paramDimensions = lastParamDecl.find({'tag': ['kDeclarationDimensions']});
-            if paramDimensions:
-                dimensions = [];
-                paramDimensions = paramDimensions.find_all({'tag': ['kDimensionRange','kDimensionScalar']});
-                for paramDimension in paramDimensions:
-                    if paramDimension.tag == 'kDimensionRange':
-                        dimensionRange = paramDimension.find_all({'tag':['kExpression']}, iter_ = PreOrderDepthTreeIterator, depth=1);
-                        left = dimensionRange[0].text;
-                        right = dimensionRange[1].text;
-                        dimensions.append( TypeDimension(left,right) );
-                    elif paramDimension.tag == 'kDimensionScalar':
-                        size = paramDimension.find({'tag':['kExpressionList']});
-                        if size:
-                            dimensions.append( TypeDimension('0',size.text+'-1') );
-
-            datatype = lastParamDecl.find({'tag': ['kTypeInfo']});
-            if datatype:
-                datatype = datatype.text;
-                if len(datatype) == 0:
-                    datatype = None;
-            else:
-                if hasattr(lastParamDecl.children[1], 'tag'):
-                    datatype = lastParamDecl.children[1].text;
-                else:
-                    datatype = None;
+    return params;
 
-            value = lastParamDecl.find({'tag': ['kTrailingAssign']});
-            if value:
-                value = value.find({'tag': ['kExpression']});
-                if value:
-                    value = value.text;
 
-        #TODO print(anytree.RenderTree(param));
-        #TODO print(param.children[0]);
-        params.append( Parameter(name, datatype=datatype, dimensions=dimensions, value=value) );
+def get_port_declaration(portDecl: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    dimensions = get_dimensions(portDecl, index);
 
-    return params;
+    datatype = index.find(['kDataTypePrimitive'], within=portDecl);
+    if datatype:
+        datatype = datatype.text;
+    else:
+        if hasattr(portDecl.children[1], 'tag'):
+            datatype = portDecl.children[1].text;
+        else:
+            datatype = None;
+
+    direction = portDecl.children[0].text;
+    return (direction, datatype, dimensions);
+
+
+# returns names declared by a declaration (i.e. identifiers outside
+# its data type, dimensions and assigned expressions)
+def get_declared_names(decl: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    excluded = [index.span(n) for n in index.iter_find_all(['kDataType', 'kTypeInfo', 'kInstantiationType',
+            'kPackedDimensions', 'kUnpackedDimensions', 'kDeclarationDimensions', 'kExpression',
+            'kTrailingAssign'], within=decl)];
+
+    names = [];
+    for ident in index.iter_find_all(['SymbolIdentifier', 'EscapedIdentifier'], within=decl):
+        pos = index.positions[id(ident)];
+        if not any(lo <= pos < hi for lo,hi in excluded):
+            names.append(ident.text);
+    return names;
+
+
+# net and variable kind keywords of port declarations
+PORT_KINDS = frozenset(['wire', 'tri', 'tri0', 'tri1', 'wand', 'wor', 'triand', 'trior', 'trireg', 'supply0',
+        'supply1', 'uwire', 'reg', 'logic', 'bit']);
+
+# Builds a symbol table of module body declarations (Verilog-1995 style port
+# declarations, nets and variables) in one pass. Maps each declared name to
+# `[direction, datatype, dimensions]`, where port declarations provide the
+# direction and net/variable declarations complete a missing type.
+def get_symbols(module_data: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    # declarations in nested scopes do not declare module ports
+    nested = [index.span(n) for n in index.iter_find_all(['kFunctionDeclaration', 'kTaskDeclaration',
+            'kClassDeclaration'], within=module_data)];
+
+    symbols = {};
+    for decl in index.iter_find_all(['kModulePortDeclaration', 'kNetDeclaration', 'kDataDeclaration'], within=module_data):
+        pos = index.positions[id(decl)];
+        if any(lo <= pos < hi for lo,hi in nested):
+            continue;
+
+        # module instantiations are data declarations too
+        if index.find(['kGateInstance'], within=decl) is not None:
+            continue;
+
+        dimensions = get_dimensions(decl, index);
+        datatype = index.find(['kDataTypePrimitive'], within=decl);
+        if datatype:
+            datatype = datatype.text;
+        elif decl.tag == 'kModulePortDeclaration':
+            # net or variable kind keyword following the direction (taken
+            # from the source text, as verible drops e.g. `reg` of
+            # `output reg q;` from the syntax tree)
+            words = [w for w in get_span_text([decl]).split()[1:3] if w != 'var'];
+            datatype = words[0] if words and words[0] in PORT_KINDS else None;
+        elif decl.tag == 'kNetDeclaration' or (len(decl.children) > 1 and isinstance(decl.children[1], verible_verilog_syntax.TokenNode)):
+            # net type keyword (e.g. `wire`)
+            datatype = decl.children[0 if decl.tag == 'kNetDeclaration' else 1].text;
+        else:
+            datatype = None;
+        direction = decl.children[0].text if decl.tag == 'kModulePortDeclaration' else None;
+
+        for name in get_declared_names(decl, index):
+            attrs = symbols.setdefault(name, [None, None, None]);
+            if direction:
+                attrs[0] = direction;
+            if datatype and not attrs[1]:
+                attrs[1] = datatype;
+            if dimensions and not attrs[2]:
+                attrs[2] = dimensions;
 
+    return symbols;
+
+
+def get_ports(module_data: verible_verilog_syntax.SyntaxData, index: TagIndex = None):
+    if index is None:
+        index = TagIndex(module_data);
 
-def get_ports(module_data: verible_verilog_syntax.SyntaxData):
     ports = [];
-    lastPortDecl = None;
-    for port in module_data.iter_find_all({"tag": ["kPortDeclaration", "kPort"]}):
+
+    # declaration attributes get resolved once per declaration and shared
+    # by all ports of the declaration
+    declAttrs = None;
+
+    # Verilog-1995 style ports (`kPort`) get resolved by the body declarations
+    symbols = None;
+
+    for port in index.iter_find_all(["kPortDeclaration", "kPort"], within=module_data):
         if port.tag == 'kPortDeclaration':
-            lastPortDecl = port;
+            declAttrs = get_port_declaration(port, index);
 
-        name = port.find({"tag": ["SymbolIdentifier", "EscapedIdentifier"]});
+        name = get_declared_names(port, index);
         if name:
-            name = name.text;
+            name = name[0];
         else:
             name = 'undefined_port';
 
-        dimensions = None;
-        direction = 'input ';
-        datatype = None;
-
-        if lastPortDecl:
-            portDimensions = lastPortDecl.find({'tag': ['kDeclarationDimensions']});
-            if portDimensions:
-                dimensions = [];
-                portDimensions = portDimensions.find_all({'tag': ['kDimensionRange','kDimensionScalar']});
-                for portDimension in portDimensions:
-                    if portDimension.tag == 'kDimensionRange':
-                        dimensionRange = portDimension.find_all({'tag':['kExpression']}, iter_ = PreOrderDepthTreeIterator, depth=1);
-                        left = dimensionRange[0].text;
-                        right = dimensionRange[1].text;
-                        dimensions.append( TypeDimension(left,right) );
-                    elif portDimension.tag == 'kDimensionScalar':
-                        size = portDimension.find({'tag':['kExpressionList']});
-                        if size:
-                            dimensions.append( TypeDimension('0',size.text+'-1') );
-
-            datatype = lastPortDecl.find({'tag': ['kDataTypePrimitive']});
-            if datatype:
-                datatype = datatype.text;
-            else:
-                if hasattr(lastPortDecl.children[1], 'tag'):
-                    datatype = lastPortDecl.children[1].text;
-                else:
-                    datatype = None;
+        if port.tag == 'kPort':
+            if symbols is None:
+                symbols = get_symbols(module_data, index);
+            attrs = symbols.get(name);
+            if attrs and attrs[0]:
+                ports.append( Port(name, direction=attrs[0], datatype=attrs[1], dimensions=attrs[2]) );
+                continue;
+            if declAttrs is None:
+                # follows no ANSI port declaration to inherit from
+                logging.warning(f"Port '{name}' has no direction declared, assuming input.");
+                declAttrs = ('input', None, None);
 
-            direction = lastPortDecl.children[0].text;
-        #TODO print(anytree.RenderTree(port));
-        #TODO print(port.children[0]);
+        direction, datatype, dimensions = declAttrs;
         ports.append( Port(name, direction=direction, datatype=datatype, dimensions=dimensions) );
 
     return ports;
 
-def process_files(parser: verible_verilog_syntax.VeribleVerilogSyntax, files: List[str]):
+# returns names of packages and interfaces referenced by a declaration
+# (package imports, scoped names `pkg::name`, interface ports and other
+# user-defined port types), i.e. its compile dependencies other than the
+# instantiated modules
+def get_uses(decl: verible_verilog_syntax.SyntaxData, index: TagIndex):
+    uses = {};
+    for n in index.iter_find_all(['kPackageImportItem', 'kQualifiedId', 'kInterfacePortHeader', 'kPortDeclaration'], within=decl):
+        if n.tag == 'kPortDeclaration':
+            # user-defined type (e.g. an interface without modport)
+            n = n.children[1] if len(n.children) > 1 else None;
+            if getattr(n, 'tag', None) != 'kDataType':
+                continue;
+            n = index.find(['kUnqualifiedId'], within=n);
+            if n is None:
+                continue;
+        name = index.find(['SymbolIdentifier'], within=n);
+        if name:
+            uses[name.text] = None;
+    return list(uses) or None;
+
+
+# returns a summary of a package or interface declaration (compile units
+# other than modules)
+def get_unit(decl: verible_verilog_syntax.SyntaxData, path: str, index: TagIndex, kind: str):
+    name = index.find(['kModuleHeader'], within=decl) or decl;
+    name = index.find(['SymbolIdentifier', 'EscapedIdentifier'], within=name);
+    if name:
+        name = name.text;
+        logging.debug(f"[{kind} {name}]");
+
+    uses = get_uses(decl, index);
+    if uses and name in uses:
+        uses.remove(name);
+    return {'name':name, 'path':path, 'kind':kind, 'uses':uses or None, 'instances':None};
+
+
+# tags of declarations that get summarized (and their kinds)
+UNIT_TAGS = {'kModuleDeclaration': 'module', 'kPackageDeclaration': 'package', 'kInterfaceDeclaration': 'interface'};
+
+# instance names and port connections are not needed for a netlist summary
+NETLIST_PRUNE = frozenset(['kGateInstance']);
+
+def get_module(module: verible_verilog_syntax.SyntaxData, path: str, index: TagIndex = None, netlist: bool = False):
+    if index is None:
+        index = TagIndex(module, NETLIST_PRUNE if netlist else None);
+
+    name = index.find(["kModuleHeader"], within=module);
+    if name:
+        name = index.find(["SymbolIdentifier", "EscapedIdentifier"], within=name);
+        if name:
+            name = name.text;
+
+    if name:
+        logging.debug(f"[{name}]");
+
+    ports = get_ports(module, index);
+    if ports:
+        for port in ports:
+            logging.debug(f"\t{port}");
+
+    params = get_parameters(module, index);
+    if params:
+        for param in params:
+            logging.debug(f"\t# {param}");
+
+    overrides = [];
+    insts = get_instances(module, index, counts=netlist, overrides=overrides);
+    if insts:
+        for inst in insts:
+            if netlist:
+                logging.debug(f"\t[{inst}] x{insts[inst]}");
+            else:
+                logging.debug(f"\t[{inst}]");
+
+    uses = get_uses(module, index);
+    if uses:
+        logging.debug(f"\tuses: {','.join(uses)}");
+
+    return {'name':name, 'path':path, 'ports':ports, 'parameters':params, 'instances':insts, 'uses':uses,
+            'overrides':overrides if any(overrides) else None};
+
+
+def get_modules(data: verible_verilog_syntax.SyntaxData, path: str, netlist: bool = False):
     modules = [];
 
+    # a single walk over the syntax tree serves all the look-ups below
+    index = TagIndex(data.tree, NETLIST_PRUNE if netlist else None);
+
+    for decl in index.iter_find_all(list(UNIT_TAGS)):
+        if decl.tag == 'kModuleDeclaration':
+            modules.append( get_module(decl, path, index, netlist) );
+        else:
+            modules.append( get_unit(decl, path, index, UNIT_TAGS[decl.tag]) );
+
+    return modules;
+
+
+# Parses `path` by `verible-verilog-syntax` and consumes its JSON output
+# incrementally, yielding the syntax (sub)tree of each module (package,
+# interface) declaration as soon as it is complete. Module subtrees are not
+# kept afterwards, hence the memory use is bound by the largest module rather
+# than the whole file.
+# Children of nodes with tags in `prune` get dropped as soon as the node is
+# complete.
+def iter_module_trees(executable: str, path: str, prune: set = None):
+    if ijson is None:
+        raise verible_verilog_syntax.Error('Streaming requires the `ijson` Python package.');
+
+    data = verible_verilog_syntax.SyntaxData();
+    with open(path, 'rb') as f:
+        try:
+            # map the source rather than reading it into memory
+            data.source_code = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ);
+        except ValueError:
+            # empty file
+            data.source_code = b'';
+
+    proc = subprocess.Popen([executable, '-export_json', '-printtree', path],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL);
+    try:
+        # stack of partially built JSON containers, each item being
+        # `[container, key]`
+        stack = [];
+        value = None;
+        for _, event, v in ijson.parse(proc.stdout):
+            if event == 'start_map':
+                stack.append([{}, None]);
+                continue;
+            elif event == 'start_array':
+                stack.append([[], None]);
+                continue;
+            elif event == 'map_key':
+                stack[-1][1] = v;
+                continue;
+            elif event == 'end_array':
+                value = stack.pop()[0];
+            elif event == 'end_map':
+                value = stack.pop()[0];
+
+                # syntax tree node (Verible exports keys sorted, so `children`
+                # precede `tag` and the tag is known only at the map end)
+                if 'tag' in value and 'children' in value:
+                    children = [c if c is not None else verible_verilog_syntax.LeafNode() for c in value['children']];
+                    if value['tag'] in UNIT_TAGS:
+                        yield verible_verilog_syntax.RootNode(value['tag'], syntax_data=data, children=children);
+                        # drop the module subtree
+                        value = None;
+                    elif prune and value['tag'] in prune:
+                        value = verible_verilog_syntax.BranchNode(value['tag'], children=[]);
+                    else:
+                        value = verible_verilog_syntax.BranchNode(value['tag'], children=children);
+                elif 'tag' in value and 'start' in value:
+                    value = verible_verilog_syntax.TokenNode(value['tag'], value['start'], value['end']);
+            else:
+                value = v;
+
+            if len(stack) == 0:
+                break;
+            container, key = stack[-1];
+            if isinstance(container, list):
+                container.append(value);
+            else:
+                container[key] = value;
+    except ijson.JSONError as e:
+        raise verible_verilog_syntax.Error(f'Failed to read `{executable}` output: {e}');
+    finally:
+        proc.stdout.close();
+        proc.wait();
+
+
+def stream_file(parser: verible_verilog_syntax.VeribleVerilogSyntax, path: str, netlist: bool = False):
+    modules = [];
+    prune = NETLIST_PRUNE if netlist else None;
+    try:
+        for decl in iter_module_trees(parser.executable, path, prune):
+            if decl.tag == 'kModuleDeclaration':
+                modules.append( get_module(decl, path, netlist=netlist) );
+            else:
+                modules.append( get_unit(decl, path, TagIndex(decl), UNIT_TAGS[decl.tag]) );
+    except (OSError, verible_verilog_syntax.Error) as e:
+        logging.error(f"Failed to parse {path}: {e}");
+        return None;
+    return modules;
+
+
+def parse_file(parser: verible_verilog_syntax.VeribleVerilogSyntax, path: str, stream: bool = False,
+        netlist: bool = False):
+    if stream:
+        return stream_file(parser, path, netlist);
+
+    try:
+        data = parser.parse_file(path);
+    except verible_verilog_syntax.Error as e:
+        logging.error(f"Failed to parse {path}: {e}");
+        return None;
+
+    if data is None or data.tree is None:
+        logging.error(f"Failed to parse {path}: no syntax tree");
+        return None;
+
+    return get_modules(data, path, netlist);
+
+
+def _init_worker(loglevel: int):
+    # worker processes may not inherit the logging setup (e.g. when
+    # started by `spawn`)
+    logging.basicConfig(level=loglevel);
+    logging.getLogger().setLevel(loglevel);
+
+
+def _process_chunk(executable: str, files: List[str], stream: bool = False, netlist: bool = False):
+    parser = verible_verilog_syntax.VeribleVerilogSyntax(executable=executable);
+
+    if stream:
+        return [stream_file(parser, f, netlist) for f in files];
+
+    # parse the whole chunk by a single `verible-verilog-syntax` call
+    try:
+        data = parser.parse_files(files);
+    except verible_verilog_syntax.Error as e:
+        # re-parse file by file to isolate the failing file(s)
+        logging.warning(f"Failed to parse a batch of {len(files)} files, re-trying one by one: {e}");
+        return [parse_file(parser, f, netlist=netlist) for f in files];
+
+    results = [];
     for f in files:
+        d = data.get(f) if data else None;
+        if d is None or d.tree is None:
+            logging.error(f"Failed to parse {f}: no syntax tree");
+            results.append(None);
+        else:
+            results.append( get_modules(d, f, netlist) );
+    return results;
+
+
+class PrescanUnsupported(Exception):
+    pass;
+
+
+# Fast, built-in lexical scanner for the common subset of Verilog/SystemVerilog
+# (ANSI port lists, simple parameters). It extracts the same module summaries
+# as the `verible` based path and raises `PrescanUnsupported` on constructs it
+# cannot handle, so that the file gets parsed by `verible` instead.
+class Prescanner(object):
+
+    token = re.compile(r"""
+        (?P<ws>\s+)|
+        (?P<comment>//[^\n]*|/\*.*?\*/)|
+        (?P<string>"(?:\\.|[^"\\\n])*")|
+        (?P<directive>`\w+)|
+        (?P<number>(\d[\d_]*)?\s*'[sS]?(?:[bB]\s*[01xXzZ?_]+|[oO]\s*[0-7xXzZ?_]+|[dD]\s*(?:[0-9_]+|[xXzZ?]_*)|[hH]\s*[0-9a-fA-FxXzZ?_]+)(?![\w$?])|
+            \d[\d_]*(\.[\d_]+)?([eE][+-]?\d+)?|'[01xXzZ])|
+        (?P<badnumber>(\d[\d_]*)?\s*'[sS]?[bodhBODH]\s*[\w$?]*)|
+        (?P<ident>[a-zA-Z_][\w$]*|\\\S+|\$[a-zA-Z_][\w$]*)|
+        (?P<op>::|<<<|>>>|<<|>>|<=|>=|===|!==|==|!=|&&|\|\||\*\*|\+:|-:|\.\*|\#\#|->|.)
+        """, re.S | re.X);
+
+    keywords = set('''
+        alias always always_comb always_ff always_latch and assert assign assume automatic before begin bind bins
+        binsof bit break buf bufif0 bufif1 byte case casex casez cell chandle checker class clocking cmos config
+        const constraint context continue cover covergroup coverpoint cross deassign default defparam design
+        disable dist do edge else end endcase endchecker endclass endclocking endconfig endfunction endgenerate
+        endgroup endinterface endmodule endpackage endprimitive endprogram endproperty endspecify endsequence
+        endtable endtask enum event eventually expect export extends extern final first_match for force foreach
+        forever fork forkjoin function generate genvar global highz0 highz1 if iff ifnone ignore_bins
+        illegal_bins implements implies import incdir include initial inout input inside instance int integer
+        interconnect interface intersect join join_any join_none large let liblist library local localparam
+        logic longint macromodule matches medium modport module nand negedge nettype new nexttime nmos nor
+        noshowcancelled not notif0 notif1 null or output package packed parameter pmos posedge primitive
+        priority program property protected pull0 pull1 pulldown pullup pulsestyle_ondetect pulsestyle_onevent
+        pure rand randc randcase randsequence rcmos real realtime ref reg reject_on release repeat restrict
+        return rnmos rpmos rtran rtranif0 rtranif1 s_always s_eventually s_nexttime s_until s_until_with
+        scalared sequence shortint shortreal showcancelled signed small soft solve specify specparam static
+        string strong strong0 strong1 struct super supply0 supply1 sync_accept_on sync_reject_on table tagged
+        task this throughout time timeprecision timeunit tran tranif0 tranif1 tri tri0 tri1 triand trior
+        trireg type typedef union unique unique0 unsigned until until_with untyped use uwire var vectored
+        virtual void wait wait_order wand weak weak0 weak1 while wildcard wire with within wor xnor xor
+        '''.split());
+
+    directions = set(['input', 'output', 'inout']);
+
+    netTypes = set(['wire', 'tri', 'tri0', 'tri1', 'wand', 'wor', 'triand', 'trior', 'trireg',
+        'supply0', 'supply1', 'uwire', 'var']);
+
+    dataTypes = set(['logic', 'bit', 'reg', 'byte', 'shortint', 'int', 'longint', 'integer', 'time',
+        'real', 'realtime', 'shortreal', 'string', 'signed', 'unsigned']);
+
+    # directives with no effect on module interfaces (with the number of
+    # their arguments, `None` standing for the rest of the line)
+    directives = {'`timescale': None, '`default_nettype': 1, '`resetall': 0, '`celldefine': 0,
+        '`endcelldefine': 0, '`unconnected_drive': 1, '`nounconnected_drive': 0};
+
+    # constructs that are left to `verible`
+    unsupported = set(['interface', 'package', 'class', 'program', 'checker', 'bind', 'config',
+        'primitive', 'covergroup', 'typedef', 'module', 'macromodule', 'extern', 'nettype']);
+
+    def __init__(self, text: str, netlist: bool = False):
+        self.text = text;
+        self.netlist = netlist;
+        self.tokens = [];
+        for m in Prescanner.token.finditer(text):
+            kind = m.lastgroup;
+            if kind == 'ws' or kind == 'comment':
+                continue;
+            if kind == 'badnumber':
+                raise PrescanUnsupported(f'malformed number {m.group(0)}');
+            if kind == 'directive':
+                self._directive(m);
+                continue;
+            self.tokens.append( (kind, m.group(0), m.start(), m.end()) );
+        self.tokens.append( ('eof', '', len(text), len(text)) );
+        self.pos = 0;
+
+    def _directive(self, m):
+        d = m.group(0);
+        if d not in Prescanner.directives:
+            raise PrescanUnsupported(f'directive {d}');
+        # arguments get dropped as they follow (see `_skip`)
+        self.tokens.append( ('directive', d, m.start(), m.end()) );
+
+    def peek(self, k: int = 0):
+        return self.tokens[min(self.pos+k, len(self.tokens)-1)];
+
+    def next(self):
+        t = self.tokens[self.pos];
+        if t[0] != 'eof':
+            self.pos += 1;
+        return t;
+
+    def expect(self, text: str):
+        t = self.next();
+        if t[1] != text:
+            raise PrescanUnsupported(f'expected `{text}`, got `{t[1]}`');
+        return t;
+
+    def isIdent(self, t):
+        return t[0] == 'ident' and t[1] not in Prescanner.keywords and not t[1].startswith('$');
+
+    def ident(self):
+        t = self.next();
+        if not self.isIdent(t):
+            raise PrescanUnsupported(f'expected identifier, got `{t[1]}`');
+        return t;
+
+    def skipDirectives(self):
+        while self.peek()[0] == 'directive':
+            d = self.next();
+            n = Prescanner.directives[d[1]];
+            if n is None:
+                eol = self.text.find('\n', d[3]);
+                eol = len(self.text) if eol < 0 else eol;
+                while self.peek()[0] != 'eof' and self.peek()[2] < eol:
+                    self.next();
+            else:
+                for _ in range(n):
+                    self.next();
+
+    # returns tokens up to the matching closing bracket (the opening one
+    # being the current token), consuming both brackets
+    def balanced(self):
+        pairs = {'(':')', '[':']', '{':'}'};
+        o = self.next()[1];
+        stack = [pairs[o]];
+        toks = [];
+        while True:
+            t = self.next();
+            if t[0] == 'eof':
+                raise PrescanUnsupported('unbalanced brackets');
+            if t[0] == 'directive':
+                raise PrescanUnsupported(f'directive {t[1]} in expression');
+            if t[1] in pairs:
+                stack.append(pairs[t[1]]);
+            elif t[1] in [')',']','}']:
+                if t[1] != stack.pop():
+                    raise PrescanUnsupported('unbalanced brackets');
+                if len(stack) == 0:
+                    return toks;
+            toks.append(t);
+
+    def slice(self, toks):
+        if not toks:
+            return '';
+        return self.text[toks[0][2]:toks[-1][3]];
+
+    # splits tokens on top-level commas
+    def split(self, toks):
+        items = [[]];
+        depth = 0;
+        for t in toks:
+            if t[1] in ['(','[','{']:
+                depth += 1;
+            elif t[1] in [')',']','}']:
+                depth -= 1;
+            elif t[1] == ',' and depth == 0:
+                items.append([]);
+                continue;
+            items[-1].append(t);
+        return [i for i in items if i];
+
+    # parses packed dimensions from `toks[i:]`; returns `(dimensions, i)`
+    def dimensions(self, toks, i: int):
+        dims = [];
+        while i < len(toks) and toks[i][1] == '[':
+            depth = 0;
+            j = i;
+            while j < len(toks):
+                if toks[j][1] == '[':
+                    depth += 1;
+                elif toks[j][1] == ']':
+                    depth -= 1;
+                    if depth == 0:
+                        break;
+                j += 1;
+            if j >= len(toks):
+                raise PrescanUnsupported('unbalanced dimension');
+            inner = toks[i+1:j];
+            parts = [];
+            depth = 0;
+            for k,t in enumerate(inner):
+                if t[1] in ['(','[','{']:
+                    depth += 1;
+                elif t[1] in [')',']','}']:
+                    depth -= 1;
+                elif t[1] in [':', '+:', '-:'] and depth == 0:
+                    parts.append(k);
+            if len(parts) == 0 and inner:
+                dims.append( TypeDimension('0', self.slice(inner)+'-1') );
+            elif len(parts) == 1 and inner[parts[0]][1] == ':':
+                dims.append( TypeDimension(self.slice(inner[:parts[0]]), self.slice(inner[parts[0]+1:])) );
+            else:
+                raise PrescanUnsupported('dimension');
+            i = j+1;
+        return (dims, i);
+
+    def parameters(self, toks):
+        params = [];
+        datatype, dims = None, None;
+        for item in self.split(toks):
+            i = 0;
+            explicit = False;
+            if item[i][1] in ['parameter', 'localparam']:
+                i += 1;
+                explicit = True;
+            if i < len(item) and item[i][1] == 'type':
+                raise PrescanUnsupported('type parameter');
+
+            j = i;
+            while j < len(item) and item[j][1] in Prescanner.dataTypes:
+                j += 1;
+            if j < len(item) and self.isIdent(item[j]) and j+1 < len(item) and self.isIdent(item[j+1]):
+                raise PrescanUnsupported('user-defined parameter type');
+            typeToks = item[i:j];
+            d, k = self.dimensions(item, j);
+
+            if explicit or typeToks or d:
+                datatype = self.slice(typeToks) or None;
+                dims = d or None;
+
+            if k >= len(item) or not self.isIdent(item[k]):
+                raise PrescanUnsupported('parameter name');
+            name = item[k][1];
+            k += 1;
+            if k < len(item) and item[k][1] == '[':
+                raise PrescanUnsupported('unpacked parameter dimensions');
+
+            value = None;
+            if k < len(item):
+                if item[k][1] != '=':
+                    raise PrescanUnsupported('parameter value');
+                value = self.slice(item[k+1:]) or None;
+
+            params.append( Parameter(name, datatype=datatype, dimensions=dims, value=value) );
+        return params;
+
+    def ports(self, toks):
+        ports = [];
+        direction, datatype, dims = None, None, None;
+        for item in self.split(toks):
+            i = 0;
+            if item[i][1] in Prescanner.directions:
+                direction = item[i][1];
+                i += 1;
+            elif direction is None:
+                raise PrescanUnsupported('non-ANSI port list');
+
+            j = i;
+            while j < len(item) and (item[j][1] in Prescanner.netTypes or item[j][1] in Prescanner.dataTypes):
+                j += 1;
+            if j < len(item) and (self.isIdent(item[j]) or item[j][1] in ['interface', 'ref']) and j+1 < len(item) and item[j+1][0] == 'ident':
+                raise PrescanUnsupported('user-defined or interface port type');
+            d, k = self.dimensions(item, j);
+
+            if i > 0 or j > i or d:
+                # the data type keywords (with signing), else the net type
+                # one (as with `verible`); signing and packed dimensions
+                # alone give none
+                primitive = [t for t in item[i:j] if t[1] in Prescanner.dataTypes];
+                while primitive and primitive[0][1] in ['signed', 'unsigned']:
+                    primitive.pop(0);
+                nettype = [t for t in item[i:j] if t[1] in Prescanner.netTypes];
+                datatype = self.slice(primitive or nettype[:1]) or None;
+                dims = d or None;
+
+            if k >= len(item) or item[k][0] != 'ident' or item[k][1] in Prescanner.keywords:
+                raise PrescanUnsupported('port name');
+            name = item[k][1];
+            if k+1 < len(item):
+                raise PrescanUnsupported('unpacked port dimensions or default value');
+
+            ports.append( Port(name, direction=direction, datatype=datatype, dimensions=dims) );
+        return ports;
+
+    def body(self):
+        insts = None;
+        overrides = [];
+        boundary = True;
+        while True:
+            t = self.peek();
+            if t[0] == 'eof':
+                raise PrescanUnsupported('missing `endmodule`');
+            if t[0] == 'directive':
+                self.skipDirectives();
+                continue;
+            if t[1] == 'endmodule':
+                self.next();
+                return (insts, overrides if any(overrides) else None);
+            if t[1] in Prescanner.unsupported:
+                raise PrescanUnsupported(t[1]);
+            if t[1] in ['function', 'task', 'specify']:
+                end = 'end' + t[1];
+                while self.next()[1] != end:
+                    if self.peek()[0] == 'eof':
+                        raise PrescanUnsupported(f'missing `{end}`');
+                boundary = True;
+                continue;
+
+            if boundary and self.isIdent(t):
+                name, n, o = self.instantiation();
+                if name is not None:
+                    # `verible` reports only simple (non-escaped) module names
+                    if not name.startswith('\\'):
+                        if self.netlist:
+                            if insts is None: insts = {};
+                            insts[name] = insts.get(name, 0) + n;
+                        else:
+                            if insts is None: insts = [];
+                            insts.append(name);
+                            overrides.append(o);
+                    boundary = True;
+                    continue;
+
+            prev = self.peek(-1)[1] if self.pos > 0 else ';';
+            t = self.next();
+            # statement boundaries (including block labels, `begin : name`)
+            boundary = t[1] in [';', 'begin', 'end', 'generate', 'endgenerate', 'else', ')', ':'] or \
+                    (prev == ':' and self.isIdent(t));
+
+    # returns parameter overrides (see `get_parameter_overrides()`) of `#(...)`
+    def overrides(self, toks):
+        def norm(toks):
+            return ' '.join(self.slice(toks).split());
+
+        items = self.split(toks);
+        if items and items[0][0][1] == '.':
+            overrides = [];
+            for i,item in enumerate(items):
+                if len(item) < 4 or item[0][1] != '.' or item[2][1] != '(' or item[-1][1] != ')':
+                    overrides.append( (i, norm(item)) );
+                elif norm(item[3:-1]):
+                    overrides.append( (item[1][1], norm(item[3:-1])) );
+            return tuple(overrides);
+        return tuple((i, norm(item)) for i,item in enumerate(items));
+
+    # tries to match a module instantiation at the current position; returns
+    # the module name, the number of instances and parameter overrides (and
+    # consumes the instantiation) or `(None, 0, None)`
+    def instantiation(self):
+        start = self.pos;
+        n = 0;
+        overrides = ();
         try:
-            data = parser.parse_file(f);
-        except verible_verilog_syntax.Error as e:
-            logging.error(f"Failed to parse {f}: {e}");
-            continue;
+            modname = self.next()[1];
+            if self.peek()[1] == '#':
+                self.next();
+                if self.peek()[1] == '(':
+                    overrides = self.overrides(self.balanced());
+                else:
+                    overrides = self.overrides([self.next()]);
+            while True:
+                if not self.isIdent(self.peek()):
+                    raise PrescanUnsupported('no instance');
+                self.next();
+                while self.peek()[1] == '[':
+                    self.balanced();
+                if self.peek()[1] != '(':
+                    raise PrescanUnsupported('no instance');
+                self.balanced();
+                n += 1;
+                t = self.next();
+                if t[1] == ';':
+                    return (modname, n, overrides);
+                if t[1] != ',':
+                    raise PrescanUnsupported('no instance');
+        except PrescanUnsupported:
+            self.pos = start;
+            return (None, 0, None);
+
+    def module(self, path: str):
+        start = self.pos;
+        self.expect('module');
+        if self.peek()[1] in ['automatic', 'static']:
+            self.next();
+        name = self.ident()[1];
+
+        # package imports in the module header
+        while self.peek()[1] == 'import':
+            while self.next()[1] != ';':
+                if self.peek()[0] == 'eof':
+                    raise PrescanUnsupported('import');
+
+        params = [];
+        if self.peek()[1] == '#':
+            self.next();
+            if self.peek()[1] != '(':
+                raise PrescanUnsupported('parameter list');
+            params = self.parameters(self.balanced());
+
+        ports = [];
+        if self.peek()[1] == '(':
+            ports = self.ports(self.balanced());
+        self.expect(';');
+
+        insts, overrides = self.body();
+
+        # package references (`pkg::name`, including imports)
+        uses = {};
+        for i in range(start, self.pos-1):
+            if self.tokens[i+1][1] == '::' and self.isIdent(self.tokens[i]):
+                uses[self.tokens[i][1]] = None;
+
+        return {'name':name, 'path':path, 'ports':ports, 'parameters':params, 'instances':insts,
+                'uses':list(uses) or None, 'overrides':overrides};
+
+    def modules(self, path: str):
+        modules = [];
+        while True:
+            self.skipDirectives();
+            t = self.peek();
+            if t[0] == 'eof':
+                return modules;
+            elif t[1] == 'module':
+                modules.append( self.module(path) );
+            elif t[1] == 'import':
+                while self.next()[1] != ';':
+                    if self.peek()[0] == 'eof':
+                        raise PrescanUnsupported('import');
+            else:
+                raise PrescanUnsupported(f'`{t[1]}` outside module');
 
-        for module in data.tree.iter_find_all({"tag": "kModuleDeclaration"}):
-            name = module.find({"tag": "kModuleHeader"});
-            if name:
-                name = name.find({"tag": ["SymbolIdentifier", "EscapedIdentifier"]},iter_=anytree.PreOrderIter);
-                if name:
-                    name = name.text;
-
-            if name:
-                logging.debug(f"[{name}]");
-
-            ports = get_ports(module);
-            if ports:
-                for port in ports:
-                    logging.debug(f"\t{port}");
-
-            params = get_parameters(module);
-            if params:
-                for param in params:
-                    logging.debug(f"\t# {param}");
-
-            insts = get_instances(module);
-            if insts:
-                for inst in insts:
-                    logging.debug(f"\t[{inst}]");
-            modules.append( {'name':name, 'path':f, 'ports':ports, 'parameters':params, 'instances':insts} );
-
-    # add "is_leaf" attribute
-    for m in modules:
-        m['is_leaf'] = m['instances'] is None;
 
-    # add "is_root" attribute
+# returns module summaries of a file, or `None` if the file uses constructs
+# the pre-scanner does not support
+def prescan_file(path: str, netlist: bool = False):
+    try:
+        with open(path, 'r', errors='replace') as f:
+            text = f.read();
+        modules = Prescanner(text, netlist).modules(path);
+    except PrescanUnsupported as e:
+        logging.debug(f"pre-scan of {path} falls back to verible: {e}");
+        return None;
+    except OSError as e:
+        logging.error(f"Failed to read {path}: {e}");
+        return None;
+
     for m in modules:
-        if 'is_root' not in m:
-            m['is_root'] = True;
-        if m['instances']:
-            for s in [sm for sm in modules if sm['name'] in m['instances']]:
-                s['is_root'] = False;
+        logging.debug(f"[{m['name']}] (pre-scan)");
+    return modules;
 
-    roots = ','.join([m['name'] for m in modules if m['is_root']]);
-    logging.debug(f"roots: {roots}");
 
-    return modules;
+# compares module summaries from the pre-scanner and from `verible`; returns
+# a list of differences
+def compare_modules(prescanned: List, parsed: List):
+    def norm(v):
+        if v is None:
+            return None;
+        if isinstance(v, tuple):
+            return tuple(norm(i) for i in v);
+        if isinstance(v, TypeDimension):
+            return (norm(v.left), norm(v.right));
+        v = ' '.join(str(v).split());
+        return v or None;
+
+    def record(r):
+        return tuple(norm(getattr(r,a)) for a in r.attrs);
+
+    diffs = [];
+    if [m['name'] for m in prescanned] != [m['name'] for m in parsed]:
+        diffs.append(f"modules {[m['name'] for m in prescanned]} != {[m['name'] for m in parsed]}");
+        return diffs;
+
+    for a,b in zip(prescanned, parsed):
+        for key in ['ports', 'parameters']:
+            ra = [record(r) for r in (a[key] or [])];
+            rb = [record(r) for r in (b[key] or [])];
+            if ra != rb:
+                diffs.append(f"{a['name']} {key}: {ra} != {rb}");
+        for key in ['instances', 'uses', 'overrides']:
+            if (a.get(key) or []) != (b.get(key) or []):
+                diffs.append(f"{a['name']} {key}: {a.get(key)} != {b.get(key)}");
+    return diffs;
+
+
+class ModuleCache(object):
+
+    # version of the cached data; bump it whenever the module summaries
+    # change, be it their layout (or the classes they are built of) or what
+    # gets extracted into them (by the verible path or the pre-scanner),
+    # otherwise stale summaries get reused
+    version = 8;
+
+    # `variant` distinguishes summaries of different layouts (e.g. netlist
+    # summaries) of the same file
+    def __init__(self, path, executable: str, maxSize: int = 512*1024*1024, variant: str = ''):
+        self.path = pathlib.Path(path);
+        self.maxSize = maxSize;
+        self.variant = variant;
+        self.tool = ModuleCache.getToolVersion(executable);
+        self.path.mkdir(parents=True, exist_ok=True);
+
+    @staticmethod
+    def getToolVersion(executable: str):
+        try:
+            proc = subprocess.run([executable, '--version'], stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL, encoding='utf-8', check=True);
+            return proc.stdout.strip();
+        except (OSError, subprocess.CalledProcessError) as e:
+            logging.warning(f"Failed to get `{executable}` version: {e}");
+
+        # fall back to identify the binary by its file properties
+        path = shutil.which(executable) or executable;
+        try:
+            st = os.stat(path);
+            return f'{path}:{st.st_size}:{st.st_mtime_ns}';
+        except OSError:
+            return path;
+
+    def key(self, path: str):
+        h = hashlib.sha256();
+        h.update(f'{ModuleCache.version}\0{self.tool}\0{self.variant}\0'.encode('utf-8'));
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024*1024), b''):
+                    h.update(chunk);
+        except OSError as e:
+            logging.warning(f"Failed to read {path}: {e}");
+            return None;
+        return h.hexdigest();
+
+    def get(self, key: str, path: str):
+        if key is None:
+            return None;
+
+        entry = self.path / (key + '.pickle');
+        try:
+            with open(entry, 'rb') as f:
+                modules = pickle.load(f);
+        except FileNotFoundError:
+            return None;
+        except Exception as e:
+            logging.warning(f"Ignoring broken cache entry {entry}: {e}");
+            return None;
+
+        # mark the entry as recently used (for eviction)
+        try:
+            os.utime(entry);
+        except OSError:
+            pass;
 
+        # cache entries are shared across paths with the same content
+        for m in modules:
+            m['path'] = path;
+        return modules;
 
-def node_depth(node: anytree.Node):
-    if not node:
-        return -1;
-    cnt = 0;
-    p = node.parent;
-    while p is not None:
-        cnt += 1;
-        p = p.parent;
-    return cnt;
+    def put(self, key: str, modules: List):
+        if key is None or modules is None:
+            return;
 
+        modules = [{k: v for k,v in m.items() if k != 'path'} for m in modules];
+        entry = self.path / (key + '.pickle');
 
-def get_module_hierarchy(modules: List, root: str):
-    if not modules:
+        # write into a temporary file first so that concurrent readers
+        # (e.g. CI agents sharing the cache) never see a partial entry
+        try:
+            fd, tmp = tempfile.mkstemp(dir=str(self.path), suffix='.tmp');
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(modules, f, protocol=pickle.HIGHEST_PROTOCOL);
+            os.replace(tmp, entry);
+        except OSError as e:
+            logging.warning(f"Failed to write cache entry {entry}: {e}");
+
+    def evict(self):
+        entries = [];
+        size = 0;
+        with os.scandir(str(self.path)) as it:
+            for e in it:
+                if not e.name.endswith('.pickle'):
+                    continue;
+                try:
+                    st = e.stat();
+                except OSError:
+                    continue;
+                entries.append( (st.st_mtime, st.st_size, e.path) );
+                size += st.st_size;
+
+        if size <= self.maxSize:
+            return;
+
+        # remove the least recently used entries first
+        entries.sort();
+        for _, s, path in entries:
+            try:
+                os.remove(path);
+            except OSError:
+                continue;
+            size -= s;
+            if size <= self.maxSize:
+                break;
+
+
+class FileList(object):
+
+    def __init__(self):
+        # include directories (`+incdir+`)
+        self.incdirs = [];
+
+        # macro definitions (`+define+`), name -> value (or `None`)
+        self.defines = {};
+
+        # library directories (`-y`) and library file extensions (`+libext+`)
+        self.libdirs = [];
+        self.libexts = [];
+
+        # library files (`-v`)
+        self.libfiles = [];
+
+        # directory -> set of directory entries (see `listdir()`)
+        self._listings = {};
+
+    # Reads a filelist and yields source file paths one by one. Relative
+    # paths are taken relative to the current directory, except in filelists
+    # included by `-F`, which are relative to the filelist itself.
+    def read(self, path: str, relative: bool = False, _stack: List[str] = None):
+        _stack = _stack or [];
+        if os.path.abspath(path) in _stack:
+            logging.error(f"Recursive filelist inclusion: {path}");
+            return;
+        _stack = _stack + [os.path.abspath(path)];
+
+        basedir = os.path.dirname(path) if relative else None;
+        def resolve(p):
+            p = os.path.expandvars(p);
+            if basedir and not os.path.isabs(p):
+                p = os.path.join(basedir, p);
+            return os.path.normpath(p);
+
+        try:
+            with open(path, 'r') as f:
+                lines = f.readlines();
+        except OSError as e:
+            logging.error(f"Failed to read filelist {path}: {e}");
+            return;
+
+        tokens = [];
+        for line in lines:
+            # strip comments
+            line = re.sub(r'(//|#).*$', '', line);
+            tokens.extend( line.split() );
+
+        i = 0;
+        while i < len(tokens):
+            t = tokens[i];
+            i += 1;
+            if t in ['-f', '-F', '-y', '-v']:
+                if i >= len(tokens):
+                    logging.error(f"Missing argument of `{t}` in {path}");
+                    break;
+                arg = resolve(tokens[i]);
+                i += 1;
+                if t == '-f' or t == '-F':
+                    yield from self.read(arg, t == '-F' or relative, _stack);
+                elif t == '-y':
+                    self.libdirs.append(arg);
+                else:
+                    self.libfiles.append(arg);
+            elif t.startswith('+incdir+'):
+                for d in t.split('+')[2:]:
+                    if d:
+                        self.incdirs.append(resolve(d));
+            elif t.startswith('+define+'):
+                for d in t.split('+')[2:]:
+                    if d:
+                        name, _, value = d.partition('=');
+                        self.defines[name] = value if value else None;
+            elif t.startswith('+libext+'):
+                self.libexts.extend([e for e in t.split('+')[2:] if e]);
+            elif t.startswith('-') or t.startswith('+'):
+                logging.warning(f"Ignoring unsupported filelist option `{t}` in {path}");
+            else:
+                yield resolve(t);
+
+    # cached directory listing; `None` for non-existing directories
+    def listdir(self, path: str):
+        if path not in self._listings:
+            try:
+                self._listings[path] = set(os.listdir(path));
+            except OSError:
+                self._listings[path] = None;
+        return self._listings[path];
+
+    # finds a file defining `module` in library directories (`-y`)
+    def findLibraryModule(self, module: str):
+        for d in self.libdirs:
+            entries = self.listdir(d);
+            if not entries:
+                continue;
+            for ext in (self.libexts or ['.v', '.sv']):
+                if module + ext in entries:
+                    return os.path.join(d, module + ext);
         return None;
 
-    module = None;
-    for m in modules:
-        if m['name'] == root:
-            module = m;
+
+# Resolves `include directives of source files. Conditional directives
+# (`ifdef etc.) are evaluated against the given macro definitions, so that
+# only active includes get followed. Results are kept per (file, define set),
+# hence headers shared by many sources get scanned just once.
+class IncludeResolver(object):
+
+    directive = re.compile(r'`(include|define|undef|ifdef|ifndef|elsif|else|endif)\b[ \t]*("([^"]+)"|<([^>]+)>|\w+)?');
+
+    def __init__(self, filelist: FileList):
+        self.filelist = filelist;
+        self.defines = frozenset(filelist.defines);
+
+        # (path, defines) -> (included files (transitively), defines after
+        # the file)
+        self._scans = {};
+
+        # files being scanned (a guard against recursive includes)
+        self._active = set();
+
+        # path -> included files (transitively)
+        self._includes = {};
+
+    # returns the path of an included file `name` (looked up relative to
+    # `curdir`, then to the include directories) or `None`
+    def find(self, name: str, curdir: str):
+        if os.path.isabs(name):
+            return os.path.normpath(name) if os.path.isfile(name) else None;
+        for d in [curdir] + self.filelist.incdirs:
+            p = os.path.normpath(os.path.join(d, name));
+            if os.path.isfile(p):
+                return p;
+        return None;
+
+    # Scans `path` with macros `defines` defined (on its start). Included
+    # files get scanned in place, in the macro context of the include (and
+    # their macro definitions apply to the rest of the file), hence results
+    # are kept per the macro context. Returns the included files (also
+    # nested ones, in the include order) and the macros defined at the end.
+    def scan(self, path: str, defines: frozenset):
+        key = (path, defines);
+        if key in self._scans:
+            return self._scans[key];
+        if path in self._active:
+            return ([], defines);
+
+        includes = [];
+        try:
+            with open(path, 'r', errors='replace') as f:
+                text = f.read();
+        except OSError as e:
+            logging.warning(f"Failed to read {path}: {e}");
+            self._scans[key] = (includes, defines);
+            return self._scans[key];
+
+        # drop comments (keeping string literals as they are)
+        text = re.sub(r'//[^\n]*|/\*.*?\*/', '', text, flags=re.S);
+
+        self._active.add(path);
+        defines = set(defines);
+
+        # stack of `[active, taken]` conditional states
+        conds = [];
+        active = True;
+        curdir = os.path.dirname(path) or os.curdir;
+        for m in IncludeResolver.directive.finditer(text):
+            d = m.group(1);
+            arg = m.group(2);
+            if d == 'ifdef' or d == 'ifndef':
+                cond = (arg in defines) == (d == 'ifdef');
+                conds.append( [active, cond] );
+                active = active and cond;
+            elif d == 'elsif':
+                if len(conds) == 0: continue;
+                outer, taken = conds[-1];
+                cond = not taken and arg in defines;
+                conds[-1][1] = taken or cond;
+                active = outer and cond;
+            elif d == 'else':
+                if len(conds) == 0: continue;
+                outer, taken = conds[-1];
+                conds[-1][1] = True;
+                active = outer and not taken;
+            elif d == 'endif':
+                if len(conds) == 0: continue;
+                active = conds.pop()[0];
+            elif not active:
+                continue;
+            elif d == 'define' and arg:
+                defines.add(arg);
+            elif d == 'undef' and arg:
+                defines.discard(arg);
+            elif d == 'include':
+                name = m.group(3) or m.group(4);
+                if not name:
+                    # e.g. an include of a macro-defined file name
+                    continue;
+                p = self.find(name, curdir);
+                if p is None:
+                    logging.warning(f"Failed to resolve `include \"{name}\" in {path}");
+                else:
+                    nested, after = self.scan(p, frozenset(defines));
+                    includes.append(p);
+                    includes.extend(nested);
+                    defines = set(after);
+
+        self._active.discard(path);
+        self._scans[key] = ([p for p in dict.fromkeys(includes) if p != path], frozenset(defines));
+        return self._scans[key];
+
+    # returns all (also nested) includes of a file, in the include order
+    def includes(self, path: str):
+        if path not in self._includes:
+            self._includes[path] = self.scan(path, self.defines)[0];
+        return self._includes[path];
+
+
+def parse_files(parser: verible_verilog_syntax.VeribleVerilogSyntax, files: List[str], jobs: int = 1,
+        stream: bool = False, netlist: bool = False):
+    results = [];
+
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1;
+
+    if jobs == 1 or len(files) < 2:
+        for f in files:
+            results.append( parse_file(parser, f, stream, netlist) );
+    else:
+        # split files into chunks that get parsed by a single `verible` call each;
+        # having more chunks than workers balances files of different sizes
+        chunksize = max(1, min(64, -(-len(files) // (4*jobs))));
+        chunks = [files[i:i+chunksize] for i in range(0, len(files), chunksize)];
+        logging.debug(f"parsing {len(files)} files in {len(chunks)} chunks by {jobs} processes");
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs,
+                initializer=_init_worker, initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+            # `map()` yields results in the order of chunks, which keeps the
+            # module order the same as for the serial processing
+            for r in executor.map(_process_chunk, [parser.executable]*len(chunks), chunks, [stream]*len(chunks),
+                    [netlist]*len(chunks)):
+                results.extend(r);
+
+    return results;
+
+
+def process_files(parser: verible_verilog_syntax.VeribleVerilogSyntax, files: List[str], jobs: int = 1,
+        cache: ModuleCache = None, classify: bool = True, split: bool = False, stream: bool = False,
+        libraries: set = None, prescan: bool = False, check: bool = False, netlist: bool = False):
+    results = [None] * len(files);
+
+    # get unchanged files from cache
+    keys = [None] * len(files);
+    if cache:
+        for i,f in enumerate(files):
+            keys[i] = cache.key(f);
+            results[i] = cache.get(keys[i], f);
+
+    # parse the remaining files
+    misses = [i for i,r in enumerate(results) if r is None];
+    if cache:
+        logging.debug(f"module cache: {len(files)-len(misses)} hits, {len(misses)} misses");
+
+    # pre-scan the remaining files, leaving only the unsupported ones to
+    # `verible` (in the check mode, `verible` results are used regardless)
+    prescanned = {};
+    if prescan or check:
+        for i in misses:
+            r = prescan_file(files[i], netlist);
+            if r is not None:
+                prescanned[i] = r;
+        logging.debug(f"pre-scan: {len(prescanned)} of {len(misses)} files");
+        if not check:
+            for i,r in prescanned.items():
+                results[i] = r;
+            misses = [i for i in misses if i not in prescanned];
+
+    for i,r in zip(misses, parse_files(parser, [files[i] for i in misses], jobs, stream, netlist)):
+        results[i] = r;
+        if cache:
+            cache.put(keys[i], r);
+        if i in prescanned and r is not None:
+            for d in compare_modules(prescanned[i], r):
+                logging.warning(f"pre-scan mismatch in {files[i]}: {d}");
+
+    if cache:
+        cache.evict();
+
+    # modules from library files (e.g. `-v`) are not candidate roots
+    if libraries:
+        for f,r in zip(files, results):
+            for m in (r or []):
+                m['is_library'] = f in libraries;
+
+    # per-file results
+    if split:
+        return results;
+
+    modules = ModuleDb();
+    for r in results:
+        if r:
+            for m in r:
+                modules.add(m);
+
+    if classify:
+        modules.classify();
+
+    return modules;
+
+
+class ModuleDb(object):
+
+    def __init__(self, modules: List = None):
+        # modules in the order of processing
+        self.modules = [];
+
+        # module name -> module (the first definition wins)
+        self.byName = {};
+
+        # module name -> unique names of instantiated modules (in the order of instantiation)
+        self.children = {};
+
+        # module name -> set of names of instantiating modules (reverse edges)
+        self.parents = {};
+
+        # package/interface name -> summary (the first definition wins); these
+        # are compile units, but no modules
+        self.units = {};
+
+        # source file -> included files (see `IncludeResolver`)
+        self.includes = {};
+
+        # include directories and macro definitions the sources get compiled with
+        self.incdirs = [];
+        self.defines = {};
+
+        if modules:
+            for m in modules:
+                self.add(m);
+            self.classify();
+
+    def __iter__(self):
+        return iter(self.modules);
+
+    def __len__(self):
+        return len(self.modules);
+
+    def __contains__(self, name: str):
+        return name in self.byName;
+
+    def add(self, module):
+        if module.get('kind', 'module') != 'module':
+            if module['name'] in self.units:
+                logging.warning(f"{module['kind'].capitalize()} `{module['name']}` redefined in {module['path']}, using the one from {self.units[module['name']]['path']}");
+            elif module['name'] is not None:
+                self.units[module['name']] = module;
+            return;
+
+        self.modules.append(module);
+        name = module['name'];
+        if name is None:
+            return;
+
+        if name in self.byName:
+            logging.warning(f"Module `{name}` redefined in {module['path']}, using the one from {self.byName[name]['path']}");
+        else:
+            self.byName[name] = module;
+            self.children[name] = list(dict.fromkeys(module['instances'] or []));
+
+        for i in (module['instances'] or []):
+            self.parents.setdefault(i, set()).add(name);
+
+    # adds modules and units of another database
+    def update(self, other: "ModuleDb"):
+        for m in itertools.chain(other, other.units.values()):
+            self.add(m);
+
+    def get(self, name: str):
+        return self.byName.get(name, None);
+
+    def instantiators(self, name: str):
+        return self.parents.get(name, set());
+
+    # names of instantiated modules with no definition
+    def missing(self):
+        return [n for n in self.parents if n not in self.byName and n not in self.units];
+
+    def roots(self):
+        return [m for m in self.modules if m['is_root']];
+
+    def leaves(self):
+        return [m for m in self.modules if m['is_leaf']];
+
+    # adds "is_leaf" and "is_root" module attributes
+    def classify(self):
+        for m in self.modules:
+            m['is_leaf'] = m['instances'] is None;
+            m['is_root'] = m['name'] not in self.parents and not m.get('is_library', False);
+
+        roots = ','.join([str(m['name']) for m in self.modules if m['is_root']]);
+        logging.debug(f"roots: {roots}");
+
+
+def resolve_library_modules(parser: verible_verilog_syntax.VeribleVerilogSyntax, modules: ModuleDb, filelist: FileList,
+        jobs: int = 1, cache: ModuleCache = None, stream: bool = False, prescan: bool = False, check: bool = False,
+        netlist: bool = False, summaries: dict = None):
+    tried = set();
+    while True:
+        files = [];
+        for name in modules.missing():
+            p = filelist.findLibraryModule(name);
+            if p and p not in tried:
+                tried.add(p);
+                files.append(p);
+        if len(files) == 0:
             break;
 
-    if not module:
+        if summaries is None:
+            logging.debug(f"parsing {len(files)} library files");
+            modules.update( process_files(parser, files, jobs, cache, classify=False, stream=stream, libraries=set(files),
+                    prescan=prescan, check=check, netlist=netlist) );
+            continue;
+
+        # per-file summaries kept across calls (e.g. in watch mode)
+        todo = [p for p in files if p not in summaries];
+        logging.debug(f"parsing {len(todo)} library files");
+        results = process_files(parser, todo, jobs, cache, classify=False, split=True, stream=stream, libraries=set(todo),
+                prescan=prescan, check=check, netlist=netlist);
+        for p,r in zip(todo, results):
+            summaries[p] = r or [];
+        modules.update( ModuleDb([m for p in files for m in summaries[p]]) );
+
+    modules.classify();
+
+
+# maps module (package, interface) names to files declaring them by a plain
+# text search (without parsing); the first declaration in the file order wins
+def index_module_files(files: List[str]):
+    ignored = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"', re.S);
+    declaration = re.compile(r'\b(?:(?:macro)?module|package|interface)\s+(?:(?:automatic|static)\s+)?(\\\S+|[a-zA-Z_][\w$]*)');
+
+    index = {};
+    for f in files:
+        try:
+            with open(f, 'r', errors='replace') as fd:
+                text = ignored.sub(' ', fd.read());
+        except OSError as e:
+            logging.error(f"Failed to read {f}: {e}");
+            continue;
+        for m in declaration.finditer(text):
+            index.setdefault(m.group(1), f);
+    return index;
+
+
+# parses only files reachable from the `top` module through instantiations
+# (as found by `index_module_files()`); falls back to parsing all files when
+# `top` is not found in the index
+def process_reachable_files(parser: verible_verilog_syntax.VeribleVerilogSyntax, files: List[str], top: str,
+        jobs: int = 1, cache: ModuleCache = None, stream: bool = False, libraries: set = None,
+        prescan: bool = False, check: bool = False, netlist: bool = False):
+    index = index_module_files(files);
+    if top not in index:
+        logging.warning(f"module '{top}' not found by the file index, parsing all files");
+        return process_files(parser, files, jobs, cache, classify=False, stream=stream, libraries=libraries,
+                prescan=prescan, check=check, netlist=netlist);
+
+    order = {f:i for i,f in enumerate(files)};
+    modules = ModuleDb();
+    parsed = set();
+    pending = [top];
+    while True:
+        todo = set(index[n] for n in pending if n in index) - parsed;
+        if len(todo) == 0:
+            break;
+        parsed |= todo;
+
+        # keep the command line order for the first-wins module definitions
+        todo = sorted(todo, key=order.get);
+        modules.update( process_files(parser, todo, jobs, cache, classify=False, stream=stream, libraries=libraries,
+                prescan=prescan, check=check, netlist=netlist) );
+        pending = modules.missing() + [u for m in itertools.chain(modules, modules.units.values())
+                for u in (m.get('uses') or []) if u not in modules and u not in modules.units];
+
+    logging.info(f"parsed {len(parsed)} of {len(files)} files reachable from '{top}'");
+    return modules;
+
+
+# returns module names in the hierarchy under `root` in a reverse dependency
+# order (i.e. instantiated modules before instantiating ones); the order is
+# the same as of a reversed pre-order walk of the fully expanded instance tree,
+# but each module gets visited only once
+def get_modules_in_hierarchy(modules: ModuleDb, root: str):
+    if not modules or root not in modules:
+        return [];
+
+    order = [];
+
+    # 1 ... on the DFS stack, 2 ... done
+    state = {root: 1};
+    stack = [(root, reversed(modules.children[root]))];
+    while len(stack) > 0:
+        name, children = stack[-1];
+        for c in children:
+            s = state.get(c, 0);
+            if s == 2:
+                continue;
+            elif s == 1:
+                cycle = [n for n,_ in stack];
+                cycle = cycle[cycle.index(c):] + [c];
+                logging.error(f"Cycle in module hierarchy: {' -> '.join(cycle)}");
+                raise Exception('Cyclic module hierarchy.');
+
+            if c not in modules:
+                # instantiated interfaces are no modules
+                if c not in modules.units:
+                    logging.warning(f'Missing definition of module `{c}`!');
+                state[c] = 2;
+                continue;
+
+            state[c] = 1;
+            stack.append( (c, reversed(modules.children[c])) );
+            break;
+        else:
+            stack.pop();
+            state[name] = 2;
+            order.append(name);
+
+    return order;
+
+
+# builds `anytree` representation of the module hierarchy (e.g. for
+# rendering); subtrees of modules instantiated at multiple places get
+# expanded only at the first place
+def get_module_hierarchy(modules: ModuleDb, root: str):
+    # also checks for cycles
+    if not get_modules_in_hierarchy(modules, root):
         return None;
 
-    mdict = {};
-    for m in modules:
-        mdict[m['name']] = m;
-
-    r = anytree.Node(module['name']);
-    nodes = [];
-    nodes.append( r );
-    while len(nodes) > 0:
-        n = nodes.pop(0);
-
-        # sanity check
-        if node_depth(n) > len(modules):
-            logging.error('Something wrong with module hierarchy!');
-            raise Exception('Too deep module hierarchy, cycle may exist.');
-
-        m = mdict[n.name];
-        if not m['is_leaf']:
-            l = [];
-            for i in m['instances']:
-                if i not in l:
-                    l.append(i);
-                    s = anytree.Node(i, parent=n);
-                    nodes.append( s );
+    r = anytree.Node(root);
+    expanded = set();
+    stack = [r];
+    while len(stack) > 0:
+        n = stack.pop();
+        if n.name in expanded:
+            n.shared = True;
+            continue;
+        expanded.add(n.name);
+
+        if n.name not in modules:
+            continue;
+
+        nodes = [anytree.Node(i, parent=n) for i in modules.children[n.name]];
+        nodes.reverse();
+        stack.extend(nodes);
 
     return r;
 
 
-# returns module file paths in a reverse dependency order
-def get_files_in_hierarchy(modules: List, root: str):
-    hierarchy = get_module_hierarchy(modules, root);
-    paths = [];
+# returns source files of the hierarchy under `root` in levels of a compile
+# order: files of a level depend (through module instances and package and
+# interface references) only on files of the preceding levels, hence files
+# of the same level can compile concurrently
+def get_compile_order(modules: ModuleDb, root: str):
+    # module and unit files in the order of a reversed pre-order walk, which
+    # orders files within levels
+    rank = {};
+    names = get_modules_in_hierarchy(modules, root);
+    for n in names:
+        rank.setdefault(modules.get(n)['path'], len(rank));
+
+    def entry(n):
+        return modules.get(n) or modules.units.get(n);
+
+    # file dependencies (closed over used packages and interfaces)
+    deps = {};
+    seen = set(names);
+    pending = list(reversed(names));
+    while len(pending) > 0:
+        n = pending.pop();
+        e = entry(n);
+        p = e['path'];
+        rank.setdefault(p, len(rank));
+        refs = deps.setdefault(p, set());
+        for r in itertools.chain(modules.children.get(n, []) if n in modules else (e['instances'] or []), e.get('uses') or []):
+            d = entry(r);
+            if d is None:
+                continue;
+            if r not in seen:
+                seen.add(r);
+                pending.append(r);
+            if d['path'] != p:
+                refs.add(d['path']);
+
+    # levels by Kahn's algorithm
+    dependents = {p:[] for p in deps};
+    counts = {};
+    for p,refs in deps.items():
+        counts[p] = len(refs);
+        for d in refs:
+            dependents.setdefault(d, []).append(p);
+
+    levels = [];
+    level = sorted([p for p,c in counts.items() if c == 0], key=rank.get);
+    while len(level) > 0:
+        levels.append(level);
+        following = [];
+        for p in level:
+            for q in dependents[p]:
+                counts[q] -= 1;
+                if counts[q] == 0:
+                    following.append(q);
+        level = sorted(following, key=rank.get);
+
+    # files depending on each other (e.g. each having a module instantiated
+    # by the other) compile together last
+    remaining = sorted([p for p,c in counts.items() if c > 0], key=rank.get);
+    if remaining:
+        logging.warning(f"Cyclic file dependencies among: {', '.join(remaining)}");
+        levels.append(remaining);
+
+    return levels;
+
+
+# returns source file paths of the hierarchy under `root` in a compile order
+def get_files_in_hierarchy(modules: ModuleDb, root: str):
+    return [p for level in get_compile_order(modules, root) for p in level];
+
+
+def select_module(modules: ModuleDb, name: str = None):
+    if not modules:
+        return None;
 
-    if hierarchy:
-        l = [node.name for node in anytree.PreOrderIter(hierarchy)];
-        l.reverse();
+    if name:
+        return modules.get(name);
 
-        pdict = {};
-        for m in modules:
-            pdict[m['name']] = m['path'];
+    # use the first root module
+    roots = modules.roots();
+    return roots[0] if roots else None;
 
-        for n in l:
-            if n in pdict:
-                p = pdict[n];
-                if p not in paths:
-                    paths.append(p);
-                del pdict[n];
-    return paths;
 
-parser = argparse.ArgumentParser(description='Extracts SystemVerilog/Verilog module interface into IP-XACT 2014.');
-parser.add_argument('-o', '--output', dest='output', required=False, type=pathlib.Path,
-        help='IP-XACT output file, stdout if not given.');
-parser.add_argument('-m', '--module', dest='module', required=False, type=str,
-        help='Name of the root module.');
-parser.add_argument('--xact', dest='xact', required=False, type=pathlib.Path,
-        help='IP-XACT 2014 to be updated with module information.')
-parser.add_argument('--verible', dest='verible', required=False, type=pathlib.Path,
-        help='Path to `verible-verilog-syntax` binary.');
-parser.add_argument('--xact-library', dest='library', required=False, type=str,
-        help='IP-XACT component library name.');
-parser.add_argument('--xact-version', dest='version', required=False, type=str,
-        help='IP-XACT component version number.');
-parser.add_argument('--xact-vendor', dest='vendor', required=False, type=str,
-        help='IP-XACT component vendor name.');
-parser.add_argument('--rwd', dest='rwd', required=False, type=pathlib.Path,
-        help='Relative Working Directory (RWD), which to make file paths relative to. Applies only if `output` not specified.');
-parser.add_argument('--log-level', dest='loglevel', required=False, type=str, default='ERROR',
-        help='Logging severity, one of: DEBUG, INFO, WARNING, ERROR, FATAL. Defaults to ERROR.');
-parser.add_argument('-l', '--log-file', dest='logfile', required=False, type=pathlib.Path, default=None,
-        help='Path to a log file. Defaults to stderr if none given.');
-parser.add_argument('files', type=pathlib.Path, nargs='+',
-        help='List of SystemVerilog/Verilog files to process.');
+# Bus abstraction: bus and abstraction type VLNVs and logical ports with
+# their direction on the master side (`in`, `out` or `None` for system and
+# slave only ports). `spellings` maps logical ports to alternative physical
+# names (e.g. `PSELx` -> `psel`).
+class BusAbstraction(object):
 
-# parse CLI options
-opts = parser.parse_args();
+    __slots__ = ['busType', 'abstractionType', 'ports', 'required', 'spellings'];
 
-# default logging setup
-logging.basicConfig(level=logging.ERROR);
+    def __init__(self, busType, abstractionType, ports: dict, required=None, spellings: dict = None):
+        self.busType = tuple(busType);
+        self.abstractionType = tuple(abstractionType);
+        self.ports = ports;
+        self.required = frozenset(required or []);
+        self.spellings = spellings or {};
 
-# setup logging destination (file or stderr)
-# (stderr is already set as default in the logging setup)
-if opts.logfile is not None:
-    logFileHandler = None;
-    try:
-        # using `'w'` will make the FileHandler overwrite the log file rather than
-        # append to it
-        logFileHandler = logging.FileHandler(str(opts.logfile),'w');
-    except Exception as e:
-        logging.error(e);
+    def __str__(self):
+        return ':'.join(self.busType);
+
+    # lower-case physical names matching each logical port
+    def iterSpellings(self):
+        for logical in self.ports:
+            yield (logical, logical.lower());
+            for s in self.spellings.get(logical, []):
+                yield (logical, s.lower());
+
+    # reads an IP-XACT `abstractionDefinition`; returns `None` on failure
+    @staticmethod
+    def fromXact(path: str):
+        try:
+            root = et.parse(path).getroot();
+        except (et.ParseError, OSError) as e:
+            logging.error(f"Failed to read bus abstraction {path}: {e}");
+            return None;
+
+        # accept any IP-XACT namespace
+        def local(e):
+            return e.tag.rsplit('}',1)[-1];
+        def child(e, tag):
+            return next((c for c in e if local(c) == tag), None);
+        def vlnv(e):
+            if e is None:
+                return None;
+            if 'vendor' in e.attrib:
+                return tuple(e.get(t, '') for t in ['vendor', 'library', 'name', 'version']);
+            return tuple(getattr(child(e,t), 'text', '') or '' for t in ['vendor', 'library', 'name', 'version']);
+
+        if local(root) != 'abstractionDefinition':
+            logging.error(f"Failed to read bus abstraction {path}: not an abstractionDefinition");
+            return None;
+
+        ports = {};
+        required = [];
+        portsElem = child(root, 'ports');
+        for port in (portsElem if portsElem is not None else []):
+            name = getattr(child(port, 'logicalName'), 'text', None);
+            if not name:
+                continue;
+            wire = child(port, 'wire');
+            onMaster = child(wire if wire is not None else port, 'onMaster');
+            direction = getattr(child(onMaster, 'direction'), 'text', None) if onMaster is not None else None;
+            presence = getattr(child(onMaster, 'presence'), 'text', None) if onMaster is not None else None;
+            ports[name] = direction if direction in ['in', 'out'] else None;
+            if presence == 'required':
+                required.append(name);
+
+        return BusAbstraction(vlnv(child(root, 'busType')), vlnv(root), ports, required);
+
+
+def _axi4_ports():
+    ports = {'ACLK': None, 'ARESETn': None};
+    for channel, signals in [('AW', 'ID ADDR LEN SIZE BURST LOCK CACHE PROT QOS REGION USER VALID'),
+            ('W', 'DATA STRB LAST USER VALID'), ('B', 'ID RESP USER VALID'),
+            ('AR', 'ID ADDR LEN SIZE BURST LOCK CACHE PROT QOS REGION USER VALID'),
+            ('R', 'ID DATA RESP LAST USER VALID')]:
+        # the B and R channels go from slave to master
+        d = 'in' if channel in ['B', 'R'] else 'out';
+        for sig in signals.split():
+            ports[channel+sig] = d;
+        ports[channel+'READY'] = 'out' if d == 'in' else 'in';
+    return ports;
 
-    if logFileHandler is not None:
-        rootLogger = logging.getLogger();
-        fmt = None;
-        if len(rootLogger.handlers) > 0:
-            fmt = rootLogger.handlers[0].formatter;
-        if fmt is not None:
-            logFileHandler.setFormatter(fmt);
-        rootLogger.handlers = []; # remove default handlers
-        rootLogger.addHandler(logFileHandler);
-
-# setup logging level
-try:
-    logging.getLogger().setLevel(opts.loglevel);
-except Exception as e:
-    logging.error(e);
-
-# `verible` parser binary
-parser_path='verible-verilog-syntax';
-if opts.verible:
-    parser_path = str(opts.verible);
-
-# input SystemVerilog/Verilog file
-file_paths = [str(f) for f in opts.files];
-
-if opts.output:
-    outputDir = str(opts.output.parent);
-elif opts.rwd:
-    outputDir = str(opts.rwd);
-else:
-    outputDir = None;
-
-# ElementTree namespaces for XML parsing
-# (the proper IP-XACT/XML namespaces shall use `xmlns:` prefix to
-# namespace names; however, ElementTree does not support it for
-# `ElementTree.register_namespace()`.)
-ns = {'xsi':"http://www.w3.org/2001/XMLSchema-instance",
-'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014"
-};
-
-for p,u in ns.items():
-    logging.debug(f"registering namespace {p}:{u}");
-    et.register_namespace(p, u);
-
-parser = verible_verilog_syntax.VeribleVerilogSyntax(executable=parser_path);
-modules = process_files(parser, file_paths);
-
-if len(modules) > 0:
-    module = None;
-    if opts.module:
-        for m in modules:
-            if m['name'] == opts.module:
-                module = m;
+
+# built-in AMBA bus abstractions
+BUS_ABSTRACTIONS = [
+    BusAbstraction(('amba.com', 'AMBA4', 'AXI4', 'r0p0_0'), ('amba.com', 'AMBA4', 'AXI4_rtl', 'r0p0_0'),
+        _axi4_ports(),
+        required=['AWADDR', 'AWVALID', 'AWREADY', 'WDATA', 'WVALID', 'WREADY', 'BVALID', 'BREADY',
+            'ARADDR', 'ARVALID', 'ARREADY', 'RDATA', 'RVALID', 'RREADY']),
+    BusAbstraction(('amba.com', 'AMBA4', 'APB4', 'r0p0_0'), ('amba.com', 'AMBA4', 'APB4_rtl', 'r0p0_0'),
+        {'PCLK': None, 'PRESETn': None, 'PADDR': 'out', 'PPROT': 'out', 'PSELx': 'out', 'PENABLE': 'out',
+            'PWRITE': 'out', 'PWDATA': 'out', 'PSTRB': 'out', 'PREADY': 'in', 'PRDATA': 'in', 'PSLVERR': 'in'},
+        required=['PADDR', 'PSELx', 'PENABLE', 'PWRITE', 'PWDATA', 'PRDATA'],
+        spellings={'PSELx': ['psel']}),
+    BusAbstraction(('amba.com', 'AMBA3', 'AHBLite', 'r2p0_0'), ('amba.com', 'AMBA3', 'AHBLite_rtl', 'r2p0_0'),
+        {'HCLK': None, 'HRESETn': None, 'HADDR': 'out', 'HBURST': 'out', 'HMASTLOCK': 'out', 'HPROT': 'out',
+            'HSIZE': 'out', 'HTRANS': 'out', 'HWDATA': 'out', 'HWRITE': 'out', 'HRDATA': 'in', 'HREADY': 'in',
+            'HRESP': 'in', 'HSELx': None, 'HREADYOUT': None},
+        required=['HADDR', 'HTRANS', 'HWRITE', 'HWDATA', 'HRDATA'],
+        spellings={'HSELx': ['hsel']}),
+];
+
+
+# Infers bus interfaces from port names. Physical names of logical ports get
+# stored in two character tries, one of reversed names (to match names with
+# a common prefix, e.g. `m_axi_awvalid`) and one of plain names (to match
+# names with a common suffix, e.g. `awvalid_s0`). Each port name is walked
+# through both tries once, hence the inference scales linearly with the
+# number of ports.
+class BusInterfaceMatcher(object):
+
+    def __init__(self, abstractions: List[BusAbstraction]):
+        self.abstractions = abstractions;
+        self.prefixTrie = {};
+        self.suffixTrie = {};
+        for i,a in enumerate(abstractions):
+            for logical, name in a.iterSpellings():
+                BusInterfaceMatcher.insert(self.prefixTrie, reversed(name), (i, logical));
+                BusInterfaceMatcher.insert(self.suffixTrie, name, (i, logical));
+
+    @staticmethod
+    def insert(trie: dict, chars, value):
+        node = trie;
+        for c in chars:
+            node = node.setdefault(c, {});
+        # `None` key holds the values of complete names
+        node.setdefault(None, []).append(value);
+
+    # yields `(abstraction, logical port, group key)` for each way the port
+    # name can be split into an affix and a logical port name
+    def candidates(self, name: str):
+        lname = name.lower();
+
+        node = self.prefixTrie;
+        for k in range(len(lname)-1, -1, -1):
+            node = node.get(lname[k]);
+            if node is None:
                 break;
-        if not module:
-            logging.error(f'Failed to find module \'{opts.module}\'!');
-            sys.exit(1);
+            if None in node and (k == 0 or lname[k-1] == '_'):
+                for i, logical in node[None]:
+                    yield (i, logical, ('prefix', lname[:k]));
+
+        node = self.suffixTrie;
+        for k in range(len(lname)-1):
+            node = node.get(lname[k]);
+            if node is None:
+                break;
+            if None in node and lname[k+1] == '_':
+                for i, logical in node[None]:
+                    yield (i, logical, ('suffix', lname[k+1:]));
+
+    # returns a list of `[name, abstraction, mode, {logical: port}]`; each
+    # port gets mapped to at most one bus interface
+    def match(self, ports: List[Port]):
+        groups = {};
+        orders = {};
+        for order, port in enumerate(ports):
+            orders[id(port)] = order;
+            for i, logical, affix in self.candidates(port.name):
+                g = groups.setdefault((i,) + affix, [order, {}]);
+                g[1].setdefault(logical, port);
+
+        # prefer groups mapping more ports, then the port order
+        used = set();
+        interfaces = [];
+        for key, (order, portMap) in sorted(groups.items(), key=lambda g: (-len(g[1][1]), g[1][0])):
+            a = self.abstractions[key[0]];
+            portMap = {l:p for l,p in portMap.items() if id(p) not in used};
+            if len(portMap) < 2 or not a.required.issubset(portMap):
+                continue;
+
+            used.update(id(p) for p in portMap.values());
+
+            # interface mode by the prevailing direction match of ports
+            votes = 0;
+            for l,p in portMap.items():
+                d = a.ports[l];
+                if d is not None and p.direction in Port.lutDirection:
+                    votes += 1 if Port.lutDirection[p.direction] == d else -1;
+            mode = 'master' if votes >= 0 else 'slave';
+
+            name = key[2].strip('_') or a.busType[2].lower();
+            portMap = {l:portMap[l] for l in a.ports if l in portMap};
+            interfaces.append( [name, a, mode, portMap, min(orders[id(p)] for p in portMap.values())] );
+
+        # keep the port order and unique names
+        interfaces.sort(key=lambda i: i[4]);
+        interfaces = [i[:4] for i in interfaces];
+        names = {};
+        for i in interfaces:
+            n = names.get(i[0], 0);
+            names[i[0]] = n + 1;
+            if n > 0:
+                i[0] = f'{i[0]}_{n}';
+        return interfaces;
+
+
+def xact_add_bus_interfaces(comp: et.Element, ports: List[Port], abstractions: List[BusAbstraction]):
+    ns = XactNamespace();
+    interfaces = BusInterfaceMatcher(abstractions).match(ports);
+    if len(interfaces) == 0:
+        return None;
+
+    def vlnv(e, v):
+        for k,t in zip(['vendor', 'library', 'name', 'version'], v):
+            e.set(k, t);
+
+    busInterfaces = et.SubElement(comp, ns.compileTag('busInterfaces'));
+    for name, a, mode, portMap in interfaces:
+        logging.debug(f"bus interface {name}: {a} {mode} ({len(portMap)} ports)");
+        bi = et.SubElement(busInterfaces, ns.compileTag('busInterface'));
+        et.SubElement(bi, ns.compileTag('name')).text = name;
+        vlnv(et.SubElement(bi, ns.compileTag('busType')), a.busType);
+        absType = et.SubElement(et.SubElement(bi, ns.compileTag('abstractionTypes')), ns.compileTag('abstractionType'));
+        vlnv(et.SubElement(absType, ns.compileTag('abstractionRef')), a.abstractionType);
+        portMaps = et.SubElement(absType, ns.compileTag('portMaps'));
+        for logical, port in portMap.items():
+            pm = et.SubElement(portMaps, ns.compileTag('portMap'));
+            et.SubElement(et.SubElement(pm, ns.compileTag('logicalPort')), ns.compileTag('name')).text = logical;
+            et.SubElement(et.SubElement(pm, ns.compileTag('physicalPort')), ns.compileTag('name')).text = port.name;
+        et.SubElement(bi, ns.compileTag(mode));
+    return busInterfaces;
+
+
+def xact_add_file(fileSet: et.Element, path: str, outputDir: str = None, include: bool = False, defines: dict = None):
+    ns = XactNamespace();
+    f = pathlib.Path(path);
+    fileSetFile = et.SubElement(fileSet, ns.compileTag('file'));
+    fileSetFileName = et.SubElement(fileSetFile, ns.compileTag('name'));
+
+    if outputDir:
+        fileSetFileName.text = os.path.relpath(str(f), outputDir);
     else:
-        # use the first root module
-        roots = [m for m in modules if m['is_root']];
-        module = roots[0];
+        fileSetFileName.text = str(f.absolute());
+
+    fileSetFileType = et.SubElement(fileSetFile, ns.compileTag('fileType'));
+    fileExt = f.suffix;
+    if fileExt:
+        if fileExt == 'v' or fileExt == 'vh':
+            fileSetFileType.text = 'verilogSource';
+        else:
+            fileSetFileType.text = 'systemVerilogSource';
+    else:
+        fileSetFileType.text = 'systemVerilogSource';
+
+    if include:
+        e = et.SubElement(fileSetFile, ns.compileTag('isIncludeFile'));
+        e.text = 'true';
+
+    for name,value in (defines or {}).items():
+        define = et.SubElement(fileSetFile, ns.compileTag('define'));
+        e = et.SubElement(define, ns.compileTag('name'));
+        e.text = name;
+        e = et.SubElement(define, ns.compileTag('value'));
+        e.text = value if value is not None else '1';
+
+    return fileSetFile;
 
-    logging.debug(anytree.RenderTree( get_module_hierarchy(modules, module['name']) ));
 
+def xact_create_component(modules: ModuleDb, module, opts, outputDir: str = None):
     xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
     'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
     };
@@ -603,6 +2789,9 @@ if len(modules) > 0:
         else:
             e.text = tag;
 
+    if getattr(opts, 'abstractions', None) and module.get('ports'):
+        xact_add_bus_interfaces(comp, module['ports'], opts.abstractions);
+
     model = et.SubElement(comp, ns.compileTag('model'));
 
     views = et.SubElement(model, ns.compileTag('views'));
@@ -618,10 +2807,15 @@ if len(modules) > 0:
     instName = et.SubElement(compInst, ns.compileTag('name'));
     instName.text = compInstRef.text;
 
+    # evaluated parameter values and dimensions
+    env = None;
+    if getattr(opts, 'evaluate', False):
+        env = ParameterEnv.get(module.get('parameters'));
+
     if 'parameters' in module:
         params  = et.SubElement(compInst, ns.compileTag('moduleParameters'));
         for param in module['parameters']:
-            params.append( param.etXact() );
+            params.append( param.etXact(env=env) );
 
     instFileSetRef = et.SubElement(compInst, ns.compileTag('fileSetRef'));
     instFileSetRef = et.SubElement(instFileSetRef, ns.compileTag('localName'));
@@ -630,39 +2824,688 @@ if len(modules) > 0:
     if 'ports' in module:
         ports  = et.SubElement(model, ns.compileTag('ports'));
         for port in module['ports']:
-            ports.append( port.etXact() );
+            ports.append( port.etXact(env) );
 
     fileSets = et.SubElement(comp, ns.compileTag('fileSets'));
     fileSet = et.SubElement(fileSets, ns.compileTag('fileSet'));
     fileSetName = et.SubElement(fileSet, ns.compileTag('name'));
     fileSetName.text = instFileSetRef.text;
 
+    done = set();
     for p in get_files_in_hierarchy(modules, module['name']):
-        f = pathlib.Path(p);
-        fileSetFile = et.SubElement(fileSet, ns.compileTag('file'));
-        fileSetFileName = et.SubElement(fileSetFile, ns.compileTag('name'));
-
+        # included files go first
+        for h in modules.includes.get(p, []):
+            if h not in done:
+                done.add(h);
+                xact_add_file(fileSet, h, outputDir, include=True);
+
+        if p not in done:
+            done.add(p);
+            xact_add_file(fileSet, p, outputDir, defines=modules.defines);
+
+    for d in modules.incdirs:
+        e = et.SubElement(fileSet, ns.compileTag('dependency'));
         if outputDir:
-            fileSetFileName.text = str(f.relative_to(outputDir));
+            e.text = os.path.relpath(d, outputDir);
+        else:
+            e.text = os.path.abspath(d);
+
+    _pretty_print(comp);
+    return comp;
+
+
+# writes the compile order of the hierarchy under `root` as a filelist (one
+# comment-separated block per level) or, for a `.json` path, as JSON; file
+# paths are relative to the directory of `path` (as with `-F` filelists)
+def write_compile_order(path: pathlib.Path, modules: ModuleDb, root: str, last: dict = None):
+    base = os.path.dirname(os.path.abspath(str(path)));
+    def rel(p):
+        return os.path.relpath(p, base);
+
+    levels = get_compile_order(modules, root);
+    files = [p for level in levels for p in level];
+    incdirs = [rel(d) for d in modules.incdirs];
+
+    if path.suffix == '.json':
+        return fileWatch.write_output(path, json.dumps({'top': root,
+            'incdirs': incdirs,
+            'defines': modules.defines,
+            'includes': {rel(p): [rel(h) for h in modules.includes[p]] for p in files if modules.includes.get(p)},
+            'levels': [[rel(p) for p in level] for level in levels]}, indent=2) + '\n', last);
+
+    lines = [];
+    for d in incdirs:
+        lines.append(f'+incdir+{d}\n');
+    for name,value in modules.defines.items():
+        lines.append(f'+define+{name}={value}\n' if value is not None else f'+define+{name}\n');
+    for i,level in enumerate(levels):
+        lines.append(f'// level {i}\n');
+        for p in level:
+            lines.append(f'{rel(p)}\n');
+    return fileWatch.write_output(path, ''.join(lines), last);
+
+
+# returns a comparable form of an element, ignoring formatting whitespace
+def xact_canonical(e: et.Element):
+    return (e.tag, tuple(sorted(e.attrib.items())), (e.text or '').strip(), tuple(xact_canonical(c) for c in e));
+
+
+def _xact_child(parent: et.Element, tag: str, name: str = None):
+    ns = XactNamespace();
+    for c in parent.findall(ns.compileTag(tag)):
+        if name is None or c.findtext(ns.compileTag('name')) == name:
+            return c;
+    return None;
+
+
+# makes `tag` children of `parent` (keyed by their `name`) match `elements`
+# in content and order; `update(old, new)` patches a kept element in place
+# and returns `True` if it changed it; other children of `parent` stay
+# untouched; returns `True` if anything changed
+def xact_patch_list(parent: et.Element, tag: str, elements: List[et.Element], update, index: int = None):
+    ns = XactNamespace();
+    tag = ns.compileTag(tag);
+    nameTag = ns.compileTag('name');
+
+    old = [c for c in parent if c.tag == tag];
+    byName = {};
+    for c in old:
+        byName.setdefault(c.findtext(nameTag), c);
+
+    changed = False;
+    result = [];
+    for e in elements:
+        o = byName.pop(e.findtext(nameTag), None);
+        if o is None:
+            result.append(e);
+            changed = True;
+        else:
+            changed = update(o, e) or changed;
+            result.append(o);
+
+    if changed or len(byName) > 0 or [id(c) for c in old] != [id(c) for c in result]:
+        # the elements go where the first of the old ones was
+        if old:
+            index = list(parent).index(old[0]);
+        elif index is None:
+            index = len(parent);
+        for c in old:
+            parent.remove(c);
+        for i,c in enumerate(result):
+            parent.insert(index+i, c);
+        return True;
+    return False;
+
+
+def _xact_update_port(old: et.Element, new: et.Element):
+    # only the signal definition, other (e.g. hand written) content stays
+    changed = False;
+    ns = XactNamespace();
+    for tag in ['wire', 'transactional']:
+        o = old.find(ns.compileTag(tag));
+        n = new.find(ns.compileTag(tag));
+        if o is None and n is None:
+            continue;
+        if o is not None and n is not None and xact_canonical(o) == xact_canonical(n):
+            continue;
+        if o is not None:
+            i = list(old).index(o);
+            old.remove(o);
         else:
-            fileSetFileName.text = str(f.absolute());
+            i = len(old);
+        if n is not None:
+            old.insert(i, n);
+        changed = True;
+    return changed;
+
 
-        fileSetFileType = et.SubElement(fileSetFile, ns.compileTag('fileType'));
-        fileExt = f.suffix;
-        if fileExt:
-            if fileExt == 'v' or fileExt == 'vh':
-                fileSetFileType.text = 'verilogSource';
+def _xact_update_parameter(old: et.Element, new: et.Element):
+    changed = False;
+    ns = XactNamespace();
+    o = old.find(ns.compileTag('value'));
+    n = new.find(ns.compileTag('value'));
+    if o is None:
+        old.append(n);
+        changed = True;
+    else:
+        if (o.text or '').strip() != (n.text or '').strip():
+            o.text = n.text;
+            changed = True;
+        # the evaluated value (see `xact_set_value()`)
+        key = ns.compileTag('value', 'vlog2ipxact');
+        if o.get(key) != n.get(key):
+            if n.get(key) is None:
+                del o.attrib[key];
             else:
-                fileSetFileType.text = 'systemVerilogSource';
+                o.set(key, n.get(key));
+            changed = True;
+    if old.get('dataType') != new.get('dataType'):
+        if new.get('dataType') is None:
+            del old.attrib['dataType'];
         else:
-            fileSetFileType.text = 'systemVerilogSource';
+            old.set('dataType', new.get('dataType'));
+        changed = True;
+    return changed;
 
-    _pretty_print(comp);
-    tree = et.ElementTree(comp);
 
-    if opts.output:
-        with open(str(opts.output), 'w') as f:
-            tree.write(f, encoding='unicode', xml_declaration=True);
+def _xact_update_file(old: et.Element, new: et.Element):
+    if xact_canonical(old) == xact_canonical(new):
+        return False;
+    old.clear();
+    old.attrib.update(new.attrib);
+    old.extend(list(new));
+    return True;
+
+
+# Patches an existing component `path` with ports, module parameters and
+# files of the generated component `comp`, leaving any other content (e.g.
+# bus interfaces, memory maps, vendor extensions) untouched. Returns
+# `(changed, tree)`, or `(None, None)` if the component cannot be read.
+def xact_patch_component(path: str, comp: et.Element):
+    ns = XactNamespace();
+    try:
+        # keep prefixes of any extra namespaces
+        for _, (prefix, uri) in et.iterparse(path, events=['start-ns']):
+            if prefix and prefix not in ['ipxact', 'xsi']:
+                et.register_namespace(prefix, uri);
+        tree = et.parse(path);
+    except (et.ParseError, OSError) as e:
+        logging.error(f"Failed to read {path}: {e}");
+        return (None, None);
+
+    root = tree.getroot();
+    if root.tag != comp.tag:
+        logging.error(f"{path} is not an IP-XACT 2014 component!");
+        return (None, None);
+
+    changed = False;
+
+    # model (as a whole, if missing)
+    model = _xact_child(root, 'model');
+    newModel = _xact_child(comp, 'model');
+    if model is None:
+        fileSets = _xact_child(root, 'fileSets');
+        root.insert(list(root).index(fileSets) if fileSets is not None else len(root), newModel);
+        model = newModel;
+        changed = True;
+
+    # module parameters of the RTL instantiation
+    newInst = newModel.find(f"{ns.compileTag('instantiations')}/{ns.compileTag('componentInstantiation')}");
+    insts = _xact_child(model, 'instantiations');
+    if insts is None:
+        insts = _xact_child(newModel, 'instantiations');
+        ports = _xact_child(model, 'ports');
+        model.insert(list(model).index(ports) if ports is not None else len(model), insts);
+        changed = True;
+    inst = _xact_child(insts, 'componentInstantiation', newInst.findtext(ns.compileTag('name')));
+    if inst is None:
+        inst = _xact_child(insts, 'componentInstantiation');
+    if inst is None:
+        insts.append(newInst);
+        changed = True;
+    else:
+        newParams = newInst.find(ns.compileTag('moduleParameters'));
+        params = inst.find(ns.compileTag('moduleParameters'));
+        if params is None and newParams is not None:
+            fileSetRef = inst.find(ns.compileTag('fileSetRef'));
+            inst.insert(list(inst).index(fileSetRef) if fileSetRef is not None else len(inst), newParams);
+            changed = True;
+        elif params is not None:
+            changed = xact_patch_list(params, 'moduleParameter',
+                    list(newParams) if newParams is not None else [], _xact_update_parameter) or changed;
+
+    # ports
+    newPorts = _xact_child(newModel, 'ports');
+    ports = _xact_child(model, 'ports');
+    if ports is None and newPorts is not None:
+        model.append(newPorts);
+        changed = True;
+    elif ports is not None:
+        changed = xact_patch_list(ports, 'port', list(newPorts) if newPorts is not None else [], _xact_update_port) or changed;
+
+    # RTL files
+    newFileSet = _xact_child(_xact_child(comp, 'fileSets'), 'fileSet');
+    name = newFileSet.findtext(ns.compileTag('name'));
+    fileSets = _xact_child(root, 'fileSets');
+    if fileSets is None:
+        fileSets = _xact_child(comp, 'fileSets');
+        root.insert(list(root).index(model)+1, fileSets);
+        changed = True;
+    else:
+        fileSet = _xact_child(fileSets, 'fileSet', name);
+        if fileSet is None:
+            fileSets.append(newFileSet);
+            changed = True;
+        else:
+            # files go after name, description and groups
+            index = len([c for c in fileSet if c.tag in [ns.compileTag(t) for t in ['name', 'displayName', 'description', 'group']]]);
+            changed = xact_patch_list(fileSet, 'file', newFileSet.findall(ns.compileTag('file')), _xact_update_file, index) or changed;
+
+            # include directories (compared as a whole)
+            deps = fileSet.findall(ns.compileTag('dependency'));
+            newDeps = newFileSet.findall(ns.compileTag('dependency'));
+            if [xact_canonical(d) for d in deps] != [xact_canonical(d) for d in newDeps]:
+                index = list(fileSet).index(deps[0]) if deps else \
+                        max([i+1 for i,c in enumerate(fileSet) if c.tag == ns.compileTag('file')] + [index]);
+                for d in deps:
+                    fileSet.remove(d);
+                for i,d in enumerate(newDeps):
+                    fileSet.insert(index+i, d);
+                changed = True;
+
+    if changed:
+        _pretty_print(root);
+    return (changed, tree);
+
+
+def xact_tostring(comp: et.Element):
+    return et.tostring(comp, encoding='unicode', xml_declaration=True);
+
+
+def xact_create_catalog(components: List, opts, catalogDir: str = None):
+    xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
+    'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
+    };
+    ns = XactNamespace();
+
+    catalog = et.Element(ns.compileTag('catalog'), xactns);
+
+    # default XML element values (unless relevant options defined
+    # through CLI options)
+    defaults = {'version':'0.0.0', 'name':'manifest'};
+
+    vlnv = {};
+    for tag in ['vendor', 'library', 'name', 'version']:
+        e = et.SubElement(catalog, ns.compileTag(tag));
+
+        # treat `name` element specifically
+        if tag == 'name':
+            e.text = opts.catalog.stem;
+            continue;
+
+        if hasattr(opts,tag) and getattr(opts,tag) is not None:
+            e.text = str(getattr(opts,tag));
+        elif tag in defaults:
+            e.text = defaults[tag];
+        else:
+            e.text = tag;
+        vlnv[tag] = e.text;
+
+    if len(components) > 0:
+        comps = et.SubElement(catalog, ns.compileTag('components'));
+        for [name,path] in components:
+            ipxactFile = et.SubElement(comps, ns.compileTag('ipxactFile'));
+            et.SubElement(ipxactFile, ns.compileTag('vlnv'), vendor=vlnv['vendor'], library=vlnv['library'], name=name, version=vlnv['version']);
+            e = et.SubElement(ipxactFile, ns.compileTag('name'));
+            if catalogDir:
+                e.text = os.path.relpath(path, catalogDir);
+            else:
+                e.text = os.path.abspath(path);
+
+    _pretty_print(catalog);
+    return catalog;
+
+
+# state of component generator worker processes (set by the initializer
+# so that the module database gets transferred only once per worker)
+_component_worker = {};
+
+def _init_component_worker(loglevel: int, modules: ModuleDb, opts, outputDir: str = None):
+    _init_worker(loglevel);
+    _component_worker['modules'] = modules;
+    _component_worker['opts'] = opts;
+    _component_worker['outputDir'] = outputDir;
+
+
+def _create_component(name: str):
+    modules = _component_worker['modules'];
+    comp = xact_create_component(modules, modules.get(name), _component_worker['opts'], _component_worker['outputDir']);
+    return xact_tostring(comp);
+
+
+# creates components for given modules; returns a list of `[name, xml]`
+# pairs in the order of `names`
+def xact_create_components(modules: ModuleDb, names: List[str], opts, outputDir: str = None, jobs: int = 1):
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1;
+
+    if jobs == 1 or len(names) < 2:
+        return [[n, xact_tostring(xact_create_component(modules, modules.get(n), opts, outputDir))] for n in names];
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_component_worker,
+            initargs=(logging.getLogger().getEffectiveLevel(), modules, opts, outputDir)) as executor:
+        chunksize = max(1, len(names) // (4*jobs));
+        return [[n, xml] for n,xml in zip(names, executor.map(_create_component, names, chunksize=chunksize))];
+
+
+def component_file_name(name: str):
+    # escaped identifiers may contain any printable character
+    return re.sub(r'[^\w.-]', '_', name) + '.xml';
+
+
+
+# writes the outputs selected by `opts` (components, catalog, compile order)
+# for `modules`; returns the list of written files, or `None` on error (see
+# `fileWatch.write_output()` for `last`)
+def write_outputs(modules: ModuleDb, opts, outputDir: str = None, last: dict = None):
+    written = [];
+
+    if opts.allroots or opts.allmodules:
+        if opts.allroots:
+            names = [m['name'] for m in modules.roots() if m['name']];
+        else:
+            names = [m['name'] for m in modules if m['name']];
+        # each module gets one component (the first definition)
+        names = list(dict.fromkeys(names));
+
+        # distinct (escaped) names may map to the same file name
+        files = {};
+        for name in names:
+            other = files.setdefault(component_file_name(name), name);
+            if other != name:
+                logging.error(f"Modules '{other}' and '{name}' map to the same component file '{component_file_name(name)}'!");
+                return None;
+
+        opts.outputdir.mkdir(parents=True, exist_ok=True);
+
+        components = [];
+        for name,xml in xact_create_components(modules, names, opts, outputDir, opts.jobs):
+            path = opts.outputdir / component_file_name(name);
+            if fileWatch.write_output(path, xml, last):
+                written.append(str(path));
+            components.append( [name,str(path)] );
+
+        if opts.catalog:
+            catalog = xact_create_catalog(components, opts, str(opts.catalog.parent));
+            if fileWatch.write_output(opts.catalog, xact_tostring(catalog), last):
+                written.append(str(opts.catalog));
+        return written;
+
+    if len(modules) == 0:
+        return written;
+
+    module = select_module(modules, opts.module);
+    if not module:
+        logging.error(f'Failed to find module \'{opts.module or "<root>"}\'!');
+        return None;
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(anytree.RenderTree( get_module_hierarchy(modules, module['name']) ));
+
+    comp = xact_create_component(modules, module, opts, outputDir);
+
+    if opts.compileorder:
+        if write_compile_order(opts.compileorder, modules, module['name'], last):
+            written.append(str(opts.compileorder));
+
+    # patch an existing component (rewritten only if changed)
+    if opts.xact:
+        changed, tree = xact_patch_component(str(opts.xact), comp);
+        if changed is None:
+            return None;
+        output = opts.output or opts.xact;
+        if not changed and output.resolve() == opts.xact.resolve():
+            logging.info(f"{opts.xact} up to date");
+        elif fileWatch.write_output(output, xact_tostring(tree.getroot()), last):
+            written.append(str(output));
+    elif opts.output:
+        if fileWatch.write_output(opts.output, xact_tostring(comp), last):
+            written.append(str(opts.output));
     else:
-        tree.write(sys.stdout, encoding='unicode', xml_declaration=True);
+        sys.stdout.write(xact_tostring(comp));
+
+    return written;
+
+
+# sets include directories, defines and the files included by each module
+# file (see `IncludeResolver`) of `filelist` on `modules`
+def resolve_includes(modules: ModuleDb, filelist: FileList):
+    resolver = IncludeResolver(filelist);
+    modules.incdirs = list(dict.fromkeys(filelist.incdirs));
+    modules.defines = filelist.defines;
+    for p in dict.fromkeys([m['path'] for m in modules]):
+        modules.includes[p] = resolver.includes(p);
+
+
+# rebuilds the outputs of a regular run (see `write_outputs()`) whenever any
+# of the `files`, the library files found through the `filelist` or the
+# `xact` component change; only the changed files get re-parsed
+def watch(parser: verible_verilog_syntax.VeribleVerilogSyntax, files: List[str], opts, outputDir: str = None,
+        cache: ModuleCache = None, libraries: set = None, filelist: FileList = None):
+    summaries = {};
+    last = {};
+    libraries = set(libraries or []);
+    polled = list(files);
+    if opts.xact:
+        polled.append(str(opts.xact));
+    watched = set(polled);
+
+    def rebuild(changed: List[str]):
+        # re-extract only modules of the changed files
+        sources = [f for f in changed if not opts.xact or f != str(opts.xact)];
+        results = process_files(parser, sources, opts.jobs, cache, classify=False, split=True, stream=opts.stream,
+                libraries=libraries, prescan=opts.prescan, check=opts.prescancheck, netlist=opts.netlist);
+        for f,r in zip(sources, results):
+            summaries[f] = r or [];
+
+        modules = ModuleDb([m for f in files for m in summaries[f]]);
+        resolve_library_modules(parser, modules, filelist or FileList(), opts.jobs, cache, opts.stream, opts.prescan,
+                opts.prescancheck, opts.netlist, summaries);
+        if opts.filelists:
+            resolve_includes(modules, filelist);
+
+        # library files found through `-y` get watched too
+        for f in summaries:
+            if f not in watched:
+                libraries.add(f);
+                polled.append(f);
+                watched.add(f);
+
+        return write_outputs(modules, opts, outputDir, last);
+
+    fileWatch.watch(polled, rebuild, opts.interval);
 
+
+parser = argparse.ArgumentParser(description='Extracts SystemVerilog/Verilog module interface into IP-XACT 2014.');
+parser.add_argument('-o', '--output', dest='output', required=False, type=pathlib.Path,
+        help='IP-XACT output file, stdout if not given.');
+parser.add_argument('-m', '--module', dest='module', required=False, type=str,
+        help='Name of the root module.');
+parser.add_argument('--all-roots', dest='allroots', required=False, action='store_true',
+        help='Create one component per root module (into `output-dir`).');
+parser.add_argument('--all-modules', dest='allmodules', required=False, action='store_true',
+        help='Create one component per module (into `output-dir`).');
+parser.add_argument('--output-dir', dest='outputdir', required=False, type=pathlib.Path,
+        help='Output directory for multiple components, one `<module>.xml` per module.');
+parser.add_argument('--catalog', dest='catalog', required=False, type=pathlib.Path,
+        help='IP-XACT catalog file referencing multiple components (see `all-roots` and `all-modules`).');
+parser.add_argument('--xact', dest='xact', required=False, type=pathlib.Path,
+        help='IP-XACT 2014 component to update with module ports, parameters and files (in place, unless `output` given). Other content of the component stays untouched and the file does not get rewritten if up to date.')
+parser.add_argument('--bus-interfaces', dest='businterfaces', required=False, action='store_true',
+        help='Infer bus interfaces from port names (built-in AXI4, APB4 and AHB-Lite abstractions).');
+parser.add_argument('--bus-abstraction', dest='busabstractions', required=False, type=pathlib.Path, action='append',
+        help='IP-XACT abstractionDefinition to infer bus interfaces of (in addition to the built-in ones). May repeat.');
+parser.add_argument('--evaluate', dest='evaluate', required=False, action='store_true',
+        help='Annotate parameter values and port dimensions with their values evaluated to integers (where constant), as `vlog2ipxact:value` attributes next to their expressions.');
+parser.add_argument('--compile-order', dest='compileorder', required=False, type=pathlib.Path,
+        help='Write the compile order of the `module` hierarchy in levels of concurrently compilable files, as a filelist or as JSON (if the file name ends with `.json`). File paths are relative to the compile order file (i.e. for `-F`).');
+parser.add_argument('--verible', dest='verible', required=False, type=pathlib.Path,
+        help='Path to `verible-verilog-syntax` binary.');
+parser.add_argument('--xact-library', dest='library', required=False, type=str,
+        help='IP-XACT component library name.');
+parser.add_argument('--xact-version', dest='version', required=False, type=str,
+        help='IP-XACT component version number.');
+parser.add_argument('--xact-vendor', dest='vendor', required=False, type=str,
+        help='IP-XACT component vendor name.');
+parser.add_argument('-j', '--jobs', dest='jobs', required=False, type=int, default=1,
+        help='Number of parallel parser processes, 0 to use all CPUs. Defaults to 1.');
+parser.add_argument('--stream', dest='stream', required=False, action='store_true',
+        help='Read `verible` output incrementally and drop each module syntax tree once processed. Bounds memory use for very large files. Requires the `ijson` package.');
+parser.add_argument('--netlist', dest='netlist', required=False, action='store_true',
+        help='Gate-level netlist mode: collect only unique instantiated module names with instance counts, skipping instance names and port connections.');
+parser.add_argument('--lazy', dest='lazy', required=False, action='store_true',
+        help='Parse only files reachable from the `module` through instantiations (found by a quick text search for module declarations).');
+parser.add_argument('--prescan', dest='prescan', required=False, action='store_true',
+        help='Extract modules by a fast built-in scanner where possible (ANSI port lists, simple parameters) and use `verible` only for files with unsupported constructs.');
+parser.add_argument('--prescan-check', dest='prescancheck', required=False, action='store_true',
+        help='Run both the built-in scanner and `verible`, report any differences and use the `verible` results.');
+parser.add_argument('--cache-dir', dest='cachedir', required=False, type=pathlib.Path,
+        help='Directory to cache parsed module information in (keyed by file content and `verible` version). The cache directory shall be trusted, as the cached data get unpickled.');
+parser.add_argument('--cache-size', dest='cachesize', required=False, type=int, default=512,
+        help='Cache size limit in MiB, least recently used entries get evicted above it. Defaults to 512.');
+parser.add_argument('--watch', dest='watch', required=False, action='store_true',
+        help='Keep running and regenerate the output whenever any of the input files changes. Requires `output` or `xact`.');
+parser.add_argument('--watch-interval', dest='interval', required=False, type=float, default=0.5,
+        help='Polling interval (in seconds) of the watch mode. Defaults to 0.5.');
+parser.add_argument('--rwd', dest='rwd', required=False, type=pathlib.Path,
+        help='Relative Working Directory (RWD), which to make file paths relative to. Applies only if `output` not specified.');
+parser.add_argument('--log-level', dest='loglevel', required=False, type=str, default='ERROR',
+        help='Logging severity, one of: DEBUG, INFO, WARNING, ERROR, FATAL. Defaults to ERROR.');
+parser.add_argument('-l', '--log-file', dest='logfile', required=False, type=pathlib.Path, default=None,
+        help='Path to a log file. Defaults to stderr if none given.');
+parser.add_argument('-f', '--filelist', dest='filelists', required=False, type=pathlib.Path, action='append',
+        help='Filelist with source files and `+incdir+`, `+define+`, `+libext+`, `-y`, `-v`, `-f` and `-F` entries. May repeat.');
+parser.add_argument('files', type=pathlib.Path, nargs='*',
+        help='List of SystemVerilog/Verilog files to process.');
+
+if __name__ == '__main__':
+
+    # parse CLI options
+    opts = parser.parse_args();
+
+    # default logging setup
+    logging.basicConfig(level=logging.ERROR);
+
+    # setup logging destination (file or stderr)
+    # (stderr is already set as default in the logging setup)
+    if opts.logfile is not None:
+        logFileHandler = None;
+        try:
+            # using `'w'` will make the FileHandler overwrite the log file rather than
+            # append to it
+            logFileHandler = logging.FileHandler(str(opts.logfile),'w');
+        except Exception as e:
+            logging.error(e);
+
+        if logFileHandler is not None:
+            rootLogger = logging.getLogger();
+            fmt = None;
+            if len(rootLogger.handlers) > 0:
+                fmt = rootLogger.handlers[0].formatter;
+            if fmt is not None:
+                logFileHandler.setFormatter(fmt);
+            rootLogger.handlers = []; # remove default handlers
+            rootLogger.addHandler(logFileHandler);
+
+    # setup logging level
+    try:
+        logging.getLogger().setLevel(opts.loglevel);
+    except Exception as e:
+        logging.error(e);
+
+    # `verible` parser binary
+    parser_path='verible-verilog-syntax';
+    if opts.verible:
+        parser_path = str(opts.verible);
+
+    # input SystemVerilog/Verilog file
+    file_paths = [str(f) for f in opts.files];
+
+    # files from filelists (get read lazily while collecting unique paths)
+    filelist = FileList();
+    for fl in (opts.filelists or []):
+        file_paths = itertools.chain(file_paths, filelist.read(str(fl)));
+    file_paths = list(dict.fromkeys(file_paths));
+
+    # library files (`-v`) not listed as regular sources
+    library_paths = [f for f in dict.fromkeys(filelist.libfiles) if f not in set(file_paths)];
+
+    if len(file_paths) == 0:
+        logging.error('No input files!');
+        sys.exit(1);
+
+    if (opts.allroots or opts.allmodules) and opts.compileorder:
+        logging.error('The `compile-order` option applies to a single component only!');
+        sys.exit(1);
+
+    if (opts.allroots or opts.allmodules) and not opts.outputdir:
+        logging.error('Generating multiple components requires the `output-dir` option!');
+        sys.exit(1);
+
+    if opts.outputdir:
+        outputDir = str(opts.outputdir);
+    elif opts.output:
+        outputDir = str(opts.output.parent);
+    elif opts.xact:
+        outputDir = str(opts.xact.parent);
+    elif opts.rwd:
+        outputDir = str(opts.rwd);
+    else:
+        outputDir = None;
+
+    # ElementTree namespaces for XML parsing
+    # (the proper IP-XACT/XML namespaces shall use `xmlns:` prefix to
+    # namespace names; however, ElementTree does not support it for
+    # `ElementTree.register_namespace()`.)
+    ns = {'xsi':"http://www.w3.org/2001/XMLSchema-instance",
+    'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014",
+    'vlog2ipxact':XactNamespace.ns['vlog2ipxact']
+    };
+
+    for p,u in ns.items():
+        logging.debug(f"registering namespace {p}:{u}");
+        et.register_namespace(p, u);
+
+    if opts.lazy and (not opts.module or opts.allroots or opts.allmodules or opts.watch):
+        logging.error('The `lazy` option requires the `module` option and a single component output!');
+        sys.exit(1);
+
+    # bus abstractions to infer bus interfaces of
+    opts.abstractions = None;
+    if opts.businterfaces or opts.busabstractions:
+        opts.abstractions = list(BUS_ABSTRACTIONS);
+        for p in (opts.busabstractions or []):
+            a = BusAbstraction.fromXact(str(p));
+            if a is None:
+                sys.exit(1);
+            opts.abstractions.append(a);
+
+    if verible_verilog_syntax is None:
+        logging.error('Parsing requires the `verible_verilog_syntax` Python module (of Verible)!');
+        sys.exit(1);
+
+    if opts.stream and ijson is None:
+        logging.error('The `stream` option requires the `ijson` Python package!');
+        sys.exit(1);
+
+    parser = verible_verilog_syntax.VeribleVerilogSyntax(executable=parser_path);
+    cache = None;
+    if opts.cachedir:
+        cache = ModuleCache(opts.cachedir, parser_path, opts.cachesize*1024*1024, 'netlist' if opts.netlist else '');
+
+    if opts.watch:
+        if not opts.output and not opts.xact and not opts.allroots and not opts.allmodules:
+            logging.error('Watch mode requires the `output` or `xact` option!');
+            sys.exit(1);
+        try:
+            watch(parser, file_paths + library_paths, opts, outputDir, cache, set(library_paths), filelist);
+        except KeyboardInterrupt:
+            pass;
+        sys.exit(0);
+
+    if opts.lazy:
+        modules = process_reachable_files(parser, file_paths + library_paths, opts.module, opts.jobs, cache, opts.stream,
+                set(library_paths), opts.prescan, opts.prescancheck, opts.netlist);
+    else:
+        modules = process_files(parser, file_paths + library_paths, opts.jobs, cache, classify=False, stream=opts.stream,
+                libraries=set(library_paths), prescan=opts.prescan, check=opts.prescancheck, netlist=opts.netlist);
+    resolve_library_modules(parser, modules, filelist, opts.jobs, cache, opts.stream, opts.prescan, opts.prescancheck,
+            opts.netlist);
+
+    # resolve includes (only when compiling from filelists, which define
+    # include directories)
+    if opts.filelists:
+        resolve_includes(modules, filelist);
+
+    if write_outputs(modules, opts, outputDir) is None:
+        sys.exit(1);
@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sys
+import time
+import sqlite3
 import pathlib
 import anytree
 import logging
 import argparse
+import fileWatch
+import concurrent.futures
 import xml.etree.ElementTree as et
 from typing import Iterable, Optional, List
 
@@ -64,16 +69,34 @@ def strip_tag(element: et.Element):
     return tag;
 
 
+# Immutable (and hence hashable) VLNV value, usable as a dictionary key.
 class Vlnv(object):
     
     attrs = ['vendor', 'library', 'name', 'version'];
 
+    __slots__ = ('vendor', 'library', 'name', 'version', '_hash');
+
     def __init__(self, **kwargs):
         for a in Vlnv.attrs:
             if kwargs is not None and a in kwargs:
-                setattr(self,a,kwargs[a]);
+                object.__setattr__(self,a,kwargs[a]);
             else:
-                setattr(self,a,None);
+                object.__setattr__(self,a,None);
+        object.__setattr__(self, '_hash', hash(tuple(self.toList())));
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'`Vlnv` is immutable, cannot set `{name}`');
+
+    def __delattr__(self, name):
+        raise AttributeError(f'`Vlnv` is immutable, cannot delete `{name}`');
+
+    # `_hash` depends on the string hash seed of the process
+    def __reduce__(self):
+        return (Vlnv._fromList, (self.toList(),));
+
+    @staticmethod
+    def _fromList(values):
+        return Vlnv(**dict(zip(Vlnv.attrs, values)));
 
     def __str__(self):
         l = [];
@@ -81,14 +104,16 @@ class Vlnv(object):
             l.append(f'{a}={getattr(self,a)}');
         return ', '.join(l);
 
+    def __repr__(self):
+        return f'Vlnv({self})';
+
     def __eq__(self, other):
         if other is None or not isinstance(other,Vlnv):
             return False;
-        else:
-            res = True;
-            for a in Vlnv.attrs:
-                res = res and (getattr(self,a) == getattr(other,a));
-            return res;
+        return self._hash == other._hash and self.toList() == other.toList();
+
+    def __hash__(self):
+        return self._hash;
 
     def isComplete(self):
         return len([a for a in Vlnv.attrs if getattr(self,a) == None]) == 0;
@@ -136,41 +161,248 @@ class Vlnv(object):
     
         return Vlnv(**vlnv);
 
+    # parses `vendor:library:name:version` notation
+    @classmethod
+    def fromString(cls, s: str):
+        values = s.split(':');
+        if len(values) != len(Vlnv.attrs):
+            raise ValueError(f'Expecting `vendor:library:name:version` VLNV: {s}');
+        return Vlnv(**dict(zip(Vlnv.attrs, values)));
+
+
+# reads the root tag and VLNV of an IP-XACT file without building its tree;
+# parsing stops as soon as the root's VLNV elements have been seen (they
+# precede any other content in IP-XACT), so large components cost only
+# a small read (the file is fed in small chunks as the header usually fits
+# in the first one)
+def sniff_vlnv(path: pathlib.Path, chunkSize: int = 1024):
+    root = None;
+    values = {};
+    depth = 0;
+    done = False;
+    parser = et.XMLPullParser(events=('start', 'end'));
+    with open(str(path), 'rb') as f:
+        while not done:
+            chunk = f.read(chunkSize);
+            if not chunk:
+                parser.close();
+                break;
+            parser.feed(chunk);
+            for event, e in parser.read_events():
+                if event == 'start':
+                    depth += 1;
+                    if root is None:
+                        root = e;
+                        if e.tag != XactNamespace().compileTag('component'):
+                            done = True;
+                            break;
+                    elif depth == 2 and strip_tag(e) not in Vlnv.attrs:
+                        done = True;
+                        break;
+                else:
+                    depth -= 1;
+                    if depth == 1:
+                        values.setdefault(strip_tag(e), e.text);
+                        root.clear();
+                        if len(values) == len(Vlnv.attrs):
+                            done = True;
+                            break;
+
+    if root is None:
+        return (None, None);
+    if root.tag != XactNamespace().compileTag('component'):
+        return (root.tag, None);
+
+    for tag in Vlnv.attrs:
+        if tag not in values:
+            logging.error(f'Missing `ipxact:{tag}` VLNV element in {strip_tag(root)} element!');
+    return (root.tag, Vlnv(**values));
+
+
+# sniffs a component file; with `memo` given, the results are kept
+# and re-used until the file `os.stat()` changes (e.g. in watch mode)
+def parse_component(path: pathlib.Path, memo: dict = None):
+    if memo is None:
+        return sniff_vlnv(path);
+
+    try:
+        st = os.stat(str(path));
+        st = (st.st_mtime_ns, st.st_size);
+    except OSError:
+        st = None;
+
+    key = os.path.abspath(str(path));
+    if key in memo and memo[key][0] == st:
+        return memo[key][1];
+
+    res = sniff_vlnv(path);
+    memo[key] = (st, res);
+    return res;
+
+
+# recursively lists `*.xml` files under `path` (in a stable order); symbolic
+# links to directories are not followed to avoid cycles
+def scan_files(path: str):
+    files = [];
+    dirs = [];
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.path);
+                    elif e.name.endswith('.xml') and e.is_file():
+                        files.append(e.path);
+                except OSError as ex:
+                    logging.warning(f"Failed to scan {e.path}: {ex}");
+    except OSError as ex:
+        logging.warning(f"Failed to scan {path}: {ex}");
+
+    files.sort();
+    for d in sorted(dirs):
+        files.extend(scan_files(d));
+    return files;
+
+
+# persistent SQLite index of sniffed files (path, `os.stat()` mtime and
+# size, root tag and VLNV); it is loaded into and saved from the memo
+# dictionary of `parse_component()`, so only files with changed stats
+# are read again
+class CatalogIndex(object):
+
+    # version of the index layout; bump it whenever the table changes
+    version = 1;
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path);
+        self.loaded = {};
+        self.db = sqlite3.connect(str(self.path));
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != CatalogIndex.version:
+            self.db.execute('DROP TABLE IF EXISTS files');
+            self.db.execute(f'PRAGMA user_version = {CatalogIndex.version}');
+        self.db.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, '
+                'mtime INTEGER, size INTEGER, tag TEXT, '
+                'vendor TEXT, library TEXT, name TEXT, version TEXT)');
+        self.db.commit();
+
+    def load(self):
+        memo = {};
+        for row in self.db.execute('SELECT * FROM files'):
+            [path,mtime,size,tag] = row[:4];
+            vlnv = None;
+            if row[4:] != (None,)*len(Vlnv.attrs):
+                vlnv = Vlnv(**dict(zip(Vlnv.attrs, row[4:])));
+            memo[path] = ((mtime,size), (tag,vlnv));
+        self.loaded = dict(memo);
+        logging.debug(f"loaded {len(memo)} entries from {self.path}");
+        return memo;
+
+    # stores the changed memo entries; entries of files that no longer
+    # exist are dropped (only those outside `paths`, the files used in
+    # the run, are checked)
+    def save(self, memo: dict, paths: set = frozenset()):
+        rows = [];
+        for path,entry in memo.items():
+            if self.loaded.get(path) == entry or entry[0] is None:
+                continue;
+            [st,[tag,vlnv]] = entry;
+            rows.append((path,) + st + (tag,) + tuple(vlnv.toList() if vlnv else [None]*len(Vlnv.attrs)));
+
+        stale = [];
+        for path in self.loaded:
+            if path not in paths and not os.path.exists(path):
+                stale.append((path,));
+
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?,?)', rows);
+            self.db.executemany('DELETE FROM files WHERE path = ?', stale);
+        logging.debug(f"saved {len(rows)} and dropped {len(stale)} entries of {self.path}");
+        self.loaded = dict(memo);
+
+    def close(self):
+        self.db.close();
+
+
+def _sniff_component(path: pathlib.Path, memo: dict = None):
+    try:
+        return parse_component(path, memo) + (None,);
+    except (et.ParseError, OSError) as e:
+        return (None, None, e);
+
 
-def xact_add_components(tree, files:List[pathlib.Path], outputDir:str = None):
+# sniffs component files on a thread pool (the work is dominated by file
+# system latency rather than CPU); results come in the input order
+def sniff_components(files: List[pathlib.Path], memo: dict = None, jobs: int = 1):
+    if jobs is not None and jobs < 1:
+        jobs = None; # let the executor pick its default
+    if jobs == 1 or len(files) < 2:
+        return [_sniff_component(f, memo) for f in files];
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(lambda f: _sniff_component(f, memo), files));
+
+
+# `scanned` files (found by a directory scan) follow the explicit `files`;
+# those that fail to parse or are not components are skipped quietly
+def xact_add_components(tree, files:List[pathlib.Path], outputDir:str = None, memo: dict = None, jobs: int = 1,
+        scanned: List[pathlib.Path] = None):
     if tree is None:
         return;
 
     catalog = tree.getroot();
 
-    trees = [];
-    for f in files:
-        try:
-            tree = et.parse(str(f));
-            trees.append([tree,f]);
-        except et.ParseError as e:
-            logging.error(f"Failed to parse {f}: {e}");
+    explicit = set(os.path.abspath(str(f)) for f in files);
+    scanned = [f for f in (scanned or []) if os.path.abspath(str(f)) not in explicit];
+    nexplicit = len(files);
+    files = list(files) + scanned;
+
+    headers = [];
+    for i,[f,[tag,vlnv,err]] in enumerate(zip(files, sniff_components(files, memo, jobs))):
+        quiet = i >= nexplicit;
+        if err is not None:
+            if quiet:
+                logging.warning(f"Failed to parse {f}: {err}");
+            else:
+                logging.error(f"Failed to parse {f}: {err}");
+        else:
+            headers.append([tag,vlnv,f,quiet]);
 
-    if len(trees) == 0:
+    if len(headers) == 0:
         return;
 
     ns = XactNamespace();
     components = catalog.find('ipxact:components',XactNamespace.ns);
 
     elemseq = ['vendor', 'library', 'name', 'version',
-            'description', 'catalogs'
+            'description', 'catalogs',
             'busDefinitions', 'abstractionDefinitions', 'components',
             'abstractors', 'designs', 'designConfigurations',
             'generatorChains',
             'vendorExtensions'];
 
-    for [comptree,path] in trees:
-        comp = comptree.getroot();
-        if comp is None or comp.tag != ns.compileTag('component'):
-            logging.error(f'Expecting `ipxact:component` root in {path}: {comp.tag}');
+    # VLNV -> `ipxactFile` element of components already in the catalog
+    registered = {};
+    for e in (components if components is not None else []):
+
+        # sanity check of the components sub-element type
+        tag = strip_tag(e);
+        if tag != 'ipxactFile':
+            logging.error(f'Unexpected element under `ipxact:components`: {tag}');
+            continue;
+
+        # get `vlnv` element
+        evlnv = e.find(ns.compileTag('vlnv'), ns.ns);
+        if evlnv is not None:
+            registered.setdefault(Vlnv.fromAttributes(evlnv), e);
+
+    for [tag,vlnv,path,quiet] in headers:
+        if tag != ns.compileTag('component') and quiet:
+            logging.debug(f'Skipping non-component {path}: {tag}');
+            continue;
+        elif tag != ns.compileTag('component'):
+            logging.error(f'Expecting `ipxact:component` root in {path}: {tag}');
             continue;
 
-        vlnv = Vlnv.fromElements(comp);
         logging.debug(f'{path} vlnv: {vlnv}');
 
         # skip adding a new element if not all VLNV defined
@@ -194,23 +426,9 @@ def xact_add_components(tree, files:List[pathlib.Path], outputDir:str = None):
             if not inserted: catalog.append(components);
 
         # check if component already registered
-        comp = None;
-        for i,e in enumerate(components):
-
-            # sanity check of the components sub-element type
-            tag = strip_tag(e);
-            if tag != 'ipxactFile':
-                logging.error(f'Unexpected element under `ipxact:components`: {tag}');
-                continue;
-
-            # get `vlnv` element
-            evlnv = e.find(ns.compileTag('vlnv'), ns.ns);
-
-            # check vlnv
-            if evlnv is not None and vlnv == Vlnv.fromAttributes(evlnv):
-                logging.error(f'Component already regoistered: {path}');
-                comp = e;
-                break;
+        comp = registered.get(vlnv);
+        if comp is not None:
+            logging.error(f'Component already regoistered: {path}');
 
         # add new component
         if comp is None:
@@ -224,10 +442,214 @@ def xact_add_components(tree, files:List[pathlib.Path], outputDir:str = None):
                 e.text = str(path.absolute());
             comp.append(e);
             components.append(comp);
+            registered[vlnv] = comp;
 
     return;
 
 
+def xact_catalog_tree(opts, outputDir: str = None, memo: dict = None):
+    ns = XactNamespace();
+    tree = None;
+    if opts.xact:
+        try:
+            tree = et.parse(str(opts.xact));
+        except et.ParseError as e:
+            logging.error(f"Failed to parse {opts.xact}: {e}");
+            return None;
+
+    if not tree:
+        # proper IP-XACT 2014 XML namespaces
+        xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
+        'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
+        };
+
+        # new root element
+        catalog = et.Element(ns.compileTag('catalog'), xactns);
+
+        # default XML element values (unless relevant options defined
+        # through CLI options)
+        defaults = {'version':'0.0.0', 'name':'manifest'};
+
+        for tag in ['vendor', 'library', 'name', 'version', 'description']:
+            e = et.SubElement(catalog, ns.compileTag(tag));
+
+            if hasattr(opts,tag) and getattr(opts,tag) is not None:
+                e.text = str(getattr(opts,tag));
+            elif tag in defaults:
+                e.text = defaults[tag];
+            else:
+                e.text = tag;
+
+        tree = et.ElementTree(catalog);
+
+    else:
+        # test if root is an ipxact component
+        catalog = tree.getroot();
+        if catalog is None or catalog.tag != ns.compileTag('catalog'):
+            logging.error(f'Expecting `ipxact:catalog` root in {opts.xact}: {catalog.tag}');
+            return None;
+
+        # sanity check for required VLNV elements
+        for i,tag in enumerate(['vendor','library','name','version']):
+            fulltag = 'ipxact:'+tag;
+            elem = catalog.find(fulltag, XactNamespace.ns);
+            if elem is None:
+                elem = et.Element(ns.compileTag(tag));
+                catalog.insert(i,elem);
+                if hasattr(opts,tag) and getattr(opts,tag) is not None:
+                    logging.warning(f'Missing `{fulltag}` element in {opts.xact}!');
+                    elem.text = getattr(opts,tag);
+                else:
+                    logging.error(f'Missing `{fulltag}` element in {opts.xact}!');
+                    elem.text = tag;
+            elif hasattr(opts,tag):
+                attr = getattr(opts,tag);
+                if attr is not None and attr != elem.text:
+                    logging.error(f'User `{fulltag}` element `{attr}` not match `{elem.text}` in {opts.xact}');
+
+        tree = et.ElementTree(catalog);
+
+    # add description (if defined)
+    if opts.description:
+        description = catalog.find('ipxact:description', XactNamespace.ns);
+        if description is None:
+            logging.warning(f'No `ipxact:description` element found in catalog!');
+            description = et.Element(ns.compileTag('description'));
+
+            predecesors = ['vendor','library','name','version'];
+            inserted = False;
+            for i,e in enumerate(tree.getroot()):
+                tag = strip_tag(e);
+                if tag not in predecesors:
+                    tree.getroot().insert(i,description);
+                    inserted = True;
+                    break;
+            if not inserted: tree.getroot().append(description);
+
+        description.text = opts.description;
+
+    # add new IP-XACT view
+    xact_add_components( tree, opts.files, outputDir, memo, opts.jobs, opts.scanned );
+
+    return tree;
+
+
+# resolves VLNVs to IP-XACT files through a root catalog and the catalogs
+# it references (recursively); each catalog is parsed once and re-used
+# until its `os.stat()` changes, lookups then are a dictionary access
+class CatalogResolver(object):
+
+    def __init__(self):
+        # catalog path -> (stat, [section, vlnv, path] entries)
+        self.memo = {};
+        # Vlnv -> file path
+        self.index = {};
+        # paths of loaded catalogs in traversal order
+        self.catalogs = [];
+
+    # `ipxactFile` entries of a catalog, their file paths resolved against
+    # the catalog directory (absolute, as catalogs get loaded by absolute
+    # paths); unreadable catalogs have no entries
+    def entries(self, path: str):
+        try:
+            st = os.stat(path);
+            st = (st.st_mtime_ns, st.st_size);
+        except OSError as e:
+            logging.error(f"Failed to read catalog {path}: {e}");
+            return [];
+
+        if path in self.memo and self.memo[path][0] == st:
+            return self.memo[path][1];
+
+        ns = XactNamespace();
+        entries = [];
+        try:
+            catalog = et.parse(path).getroot();
+        except (et.ParseError, OSError) as e:
+            logging.error(f"Failed to read catalog {path}: {e}");
+            catalog = None;
+
+        if catalog is not None and catalog.tag != ns.compileTag('catalog'):
+            logging.error(f'Expecting `ipxact:catalog` root in {path}: {catalog.tag}');
+        elif catalog is not None:
+            base = os.path.dirname(path);
+            for section in catalog:
+                for e in section.findall('ipxact:ipxactFile', XactNamespace.ns):
+                    vlnv = Vlnv.fromAttributes(e.find('ipxact:vlnv', XactNamespace.ns));
+                    name = e.find('ipxact:name', XactNamespace.ns);
+                    if vlnv is None or not vlnv.isComplete() or name is None or not name.text:
+                        logging.error(f'Incomplete `ipxact:ipxactFile` entry in {path}');
+                        continue;
+                    entries.append([strip_tag(section), vlnv, os.path.normpath(os.path.join(base, name.text.strip()))]);
+
+        self.memo[path] = (st, entries);
+        return entries;
+
+    # (re)builds the index from the `root` catalog
+    def load(self, root: str):
+        self.index = {};
+        self.catalogs = [];
+        self._load(os.path.abspath(str(root)), []);
+        logging.info(f"indexed {len(self.index)} VLNVs from {len(self.catalogs)} catalogs");
+        return self.index;
+
+    def _load(self, path: str, visiting: List[str]):
+        if path in visiting:
+            cycle = ' -> '.join(visiting[visiting.index(path):] + [path]);
+            logging.warning(f'Catalog reference cycle: {cycle}');
+            return;
+        if path in self.catalogs:
+            return;
+
+        self.catalogs.append(path);
+        visiting.append(path);
+        entries = self.entries(path);
+        for [section,vlnv,file] in entries:
+            if vlnv in self.index and self.index[vlnv] != file:
+                logging.warning(f'Duplicate VLNV {vlnv} in {path}: {file} (using {self.index[vlnv]})');
+            else:
+                self.index[vlnv] = file;
+        # (own entries take precedence over those of the referenced catalogs,
+        # which precede them in the catalog)
+        for [section,vlnv,file] in entries:
+            if section == 'catalogs':
+                self._load(os.path.abspath(file), visiting);
+        visiting.pop();
+
+    # returns the file of a VLNV (`Vlnv` or `vendor:library:name:version`)
+    # or `None` if unknown
+    def resolve(self, vlnv):
+        if isinstance(vlnv, str):
+            vlnv = Vlnv.fromString(vlnv);
+        return self.index.get(vlnv);
+
+
+# (scanned directories are not re-scanned, only the files found by the
+# initial scan are watched)
+def watch(opts, outputDir: str = None, index: CatalogIndex = None):
+    paths = [str(f) for f in opts.files + opts.scanned];
+    if opts.xact:
+        paths.append(str(opts.xact));
+
+    memo = index.load() if index else {};
+    used = set(os.path.abspath(p) for p in paths);
+
+    # (the existing output counts as the last generated content)
+    last = {};
+
+    def rebuild(changed: List[str]):
+        tree = xact_catalog_tree(opts, outputDir, memo);
+        if tree is None:
+            return None;
+        _pretty_print(tree.getroot());
+        s = et.tostring(tree.getroot(), encoding='unicode', xml_declaration=True);
+        if index:
+            index.save(memo, used);
+        return [str(opts.output)] if fileWatch.write_output(opts.output, s, last) else [];
+
+    fileWatch.watch(paths, rebuild, opts.interval);
+
+
 parser = argparse.ArgumentParser(description='Creates or adds to references to IP-XACT 2014 components into IP-XACT 2014 catalog.');
 parser.add_argument('-o', '--output', dest='output', required=False, type=pathlib.Path,
         help='IP-XACT output file, stdout if not given.');
@@ -245,159 +667,150 @@ parser.add_argument('--xact-name', dest='name', required=False, type=str, defaul
         help='IP-XACT catalog name.');
 parser.add_argument('--xact-description', dest='description', required=False, type=str, default='mainfest',
         help='IP-XACT catalog/library description.');
+parser.add_argument('--watch', dest='watch', required=False, action='store_true',
+        help='Keep running and regenerate the output whenever any of the input files changes. Requires `output`.');
+parser.add_argument('--watch-interval', dest='interval', required=False, type=float, default=0.5,
+        help='Polling interval (in seconds) of the watch mode. Defaults to 0.5.');
+parser.add_argument('-j', '--jobs', dest='jobs', required=False, type=int, default=1,
+        help='Number of parallel threads reading component files, 0 for the default pool size. Defaults to 1.');
+parser.add_argument('--resolve', dest='resolve', required=False, type=str, action='append', default=[],
+        help='VLNV (`vendor:library:name:version`) to be resolved to a file path through the `xact` catalog and the catalogs it references. Can be given multiple times; no catalog is written.');
 parser.add_argument('--rwd', dest='rwd', required=False, type=pathlib.Path,
         help='Relative Working Directory (RWD), which to make file paths relative to. Applies only if `output` not specified.');
 parser.add_argument('--log-level', dest='loglevel', required=False, type=str, default='ERROR',
         help='Logging severity, one of: DEBUG, INFO, WARNING, ERROR, FATAL. Defaults to ERROR.');
 parser.add_argument('-l', '--log-file', dest='logfile', required=False, type=pathlib.Path, default=None,
         help='Path to a log file. Defaults to stderr if none given.');
-parser.add_argument('files', type=pathlib.Path, nargs='+',
+parser.add_argument('--scan', dest='scan', required=False, type=pathlib.Path, action='append', default=[],
+        help='Directory to recursively scan for IP-XACT 2014 component files (`*.xml`) to be added to the catalog. Other files are skipped. Can be given multiple times.');
+parser.add_argument('--index', dest='index', required=False, type=pathlib.Path,
+        help='SQLite index of file stats and VLNVs kept across runs, so that only changed files are read again.');
+parser.add_argument('files', type=pathlib.Path, nargs='*',
         help='List of IP-XACT 2014 component files to be added to the catalog.');
 
-# parse CLI options
-opts = parser.parse_args();
+if __name__ == '__main__':
+
+    # parse CLI options
+    opts = parser.parse_args();
 
-# default logging setup
-logging.basicConfig(level=logging.ERROR);
+    # default logging setup
+    logging.basicConfig(level=logging.ERROR);
 
-# setup logging destination (file or stderr)
-# (stderr is already set as default in the logging setup)
-if opts.logfile is not None:
-    logFileHandler = None;
+    # setup logging destination (file or stderr)
+    # (stderr is already set as default in the logging setup)
+    if opts.logfile is not None:
+        logFileHandler = None;
+        try:
+            # using `'w'` will make the FileHandler overwrite the log file rather than
+            # append to it
+            logFileHandler = logging.FileHandler(str(opts.logfile),'w');
+        except Exception as e:
+            logging.error(e);
+
+        if logFileHandler is not None:
+            rootLogger = logging.getLogger();
+            fmt = None;
+            if len(rootLogger.handlers) > 0:
+                fmt = rootLogger.handlers[0].formatter;
+            if fmt is not None:
+                logFileHandler.setFormatter(fmt);
+            rootLogger.handlers = []; # remove default handlers
+            rootLogger.addHandler(logFileHandler);
+
+    # setup logging level
     try:
-        # using `'w'` will make the FileHandler overwrite the log file rather than
-        # append to it
-        logFileHandler = logging.FileHandler(str(opts.logfile),'w');
+        logging.getLogger().setLevel(opts.loglevel);
     except Exception as e:
         logging.error(e);
 
-    if logFileHandler is not None:
-        rootLogger = logging.getLogger();
-        fmt = None;
-        if len(rootLogger.handlers) > 0:
-            fmt = rootLogger.handlers[0].formatter;
-        if fmt is not None:
-            logFileHandler.setFormatter(fmt);
-        rootLogger.handlers = []; # remove default handlers
-        rootLogger.addHandler(logFileHandler);
-
-# setup logging level
-try:
-    logging.getLogger().setLevel(opts.loglevel);
-except Exception as e:
-    logging.error(e);
-
-# output directory
-# (`None` means to use absolute paths)
-if opts.output:
-    outputDir = str(opts.output.parent);
-elif opts.rwd:
-    outputDir = str(opts.rwd);
-else:
-    outputDir = None;
-
-# ElementTree namespaces for XML parsing
-# (the proper IP-XACT/XML namespaces shall use `xmlns:` prefix to
-# namespace names; however, ElementTree does not support it for
-# `ElementTree.register_namespace()`.)
-ns = {'xsi':"http://www.w3.org/2001/XMLSchema-instance",
-'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014"
-};
-
-for p,u in ns.items():
-    logging.debug(f"registering namespace {p}:{u}");
-    et.register_namespace(p, u);
-
-ns = XactNamespace();
-tree = None;
-if opts.xact:
-    try:
-        tree = et.parse(str(opts.xact));
-    except et.ParseError as e:
-        logging.error(f"Failed to parse {opts.xact}: {e}");
-        sys.exit(1);
-
-if not tree:
-    # proper IP-XACT 2014 XML namespaces
-    xactns = {'xmlns:xsi':"http://www.w3.org/2001/XMLSchema-instance",
-    'xsi:schemaLocation':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd"
+    # output directory
+    # (`None` means to use absolute paths)
+    if opts.output:
+        outputDir = str(opts.output.parent);
+    elif opts.rwd:
+        outputDir = str(opts.rwd);
+    else:
+        outputDir = None;
+
+    # ElementTree namespaces for XML parsing
+    # (the proper IP-XACT/XML namespaces shall use `xmlns:` prefix to
+    # namespace names; however, ElementTree does not support it for
+    # `ElementTree.register_namespace()`.)
+    ns = {'xsi':"http://www.w3.org/2001/XMLSchema-instance",
+    'ipxact':"http://www.accellera.org/XMLSchema/IPXACT/1685-2014"
     };
 
-    # new root element
-    catalog = et.Element(ns.compileTag('catalog'), xactns);
-
-    # default XML element values (unless relevant options defined
-    # through CLI options)
-    defaults = {'version':'0.0.0', 'name':'manifest'};
-
-    for tag in ['vendor', 'library', 'name', 'version', 'description']:
-        e = et.SubElement(catalog, ns.compileTag(tag));
-
-        if hasattr(opts,tag) and getattr(opts,tag) is not None:
-            e.text = str(getattr(opts,tag));
-        elif tag in defaults:
-            e.text = defaults[tag];
-        else:
-            e.text = tag;
-
-    tree = et.ElementTree(catalog);
-
-else:
-    # test if root is an ipxact component
-    catalog = tree.getroot();
-    if catalog is None or catalog.tag != ns.compileTag('catalog'):
-        logging.error(f'Expecting `ipxact:catalog` root in {opts.xact}: {catalog.tag}');
-        sys.exit(1);
-
-    # sanity check for required VLNV elements
-    for i,tag in enumerate(['vendor','library','name','version']):
-        fulltag = 'ipxact:'+tag;
-        elem = catalog.find(fulltag, XactNamespace.ns);
-        if elem is None:
-            elem = et.Element(ns.compileTag(tag));
-            catalog.insert(i,elem);
-            if hasattr(opts,tag) and getattr(opts,tag) is not None:
-                logging.warning(f'Missing `{fulltag}` element in {opts.xact}!');
-                elem.text = getattr(opts,tag);
+    for p,u in ns.items():
+        logging.debug(f"registering namespace {p}:{u}");
+        et.register_namespace(p, u);
+
+    if opts.resolve:
+        if not opts.xact:
+            logging.error('VLNV resolution requires the `xact` catalog!');
+            sys.exit(1);
+        resolver = CatalogResolver();
+        resolver.load(opts.xact);
+        status = 0;
+        for v in opts.resolve:
+            try:
+                path = resolver.resolve(v);
+            except ValueError as e:
+                logging.error(e);
+                path = None;
+            if path is None:
+                logging.error(f"Unresolved VLNV: {v}");
+                status = 1;
             else:
-                logging.error(f'Missing `{fulltag}` element in {opts.xact}!');
-                elem.text = tag;
-        elif hasattr(opts,tag):
-            attr = getattr(opts,tag);
-            if attr is not None and attr != elem.text:
-                logging.error(f'User `{fulltag}` element `{attr}` not match `{elem.text}` in {opts.xact}');
-
-    tree = et.ElementTree(catalog);
-
-# add description (if defined)
-if opts.description:
-    description = catalog.find('ipxact:description', XactNamespace.ns);
-    if description is None:
-        logging.warning(f'No `ipxact:description` element found in catalog!');
-        description = et.Element(ns.compileTag('description'));
-    
-        predecesors = ['vendor','library','name','version'];
-        inserted = False;
-        for i,e in enumerate(tree.getroot()):
-            tag = strip_tag(e);
-            if tag not in predecesors:
-                tree.getroot().insert(i,description);
-                inserted = True;
-                break;
-        if not inserted: tree.getroot().append(description);
+                print(path);
+        sys.exit(status);
 
-    description.text = opts.description;
+    if not opts.files and not opts.scan:
+        logging.error('No component files or directories to scan given!');
+        sys.exit(1);
 
-# add new IP-XACT view
-xact_add_components( tree, opts.files, outputDir );
+    # files from the scanned directories
+    opts.scanned = [];
+    for d in opts.scan:
+        t = time.monotonic();
+        files = scan_files(str(d));
+        logging.info(f"found {len(files)} files in {d} in {time.monotonic()-t:.3f}s");
+        opts.scanned.extend(pathlib.Path(f) for f in files);
 
-# reformat XML
-_pretty_print(tree.getroot());
+    index = None;
+    if opts.index:
+        try:
+            index = CatalogIndex(opts.index);
+        except sqlite3.Error as e:
+            logging.error(f"Failed to open index {opts.index}: {e}");
+            sys.exit(1);
+
+    if opts.watch:
+        if not opts.output:
+            logging.error('Watch mode requires the `output` option!');
+            sys.exit(1);
+        if opts.xact and opts.xact.resolve() == opts.output.resolve():
+            logging.error('Watch mode cannot update the `xact` input in place!');
+            sys.exit(1);
+        try:
+            watch(opts, outputDir, index);
+        except KeyboardInterrupt:
+            pass;
+        sys.exit(0);
+
+    memo = index.load() if index else None;
+    tree = xact_catalog_tree(opts, outputDir, memo);
+    if index:
+        index.save(memo, set(os.path.abspath(str(f)) for f in opts.files + opts.scanned));
+        index.close();
+    if tree is None:
+        sys.exit(1);
 
-# print XML
-if opts.output:
-    with open(str(opts.output), 'w') as f:
-        tree.write(f, encoding='unicode', xml_declaration=True);
-else:
-    tree.write(sys.stdout, encoding='unicode', xml_declaration=True);
+    # reformat XML
+    _pretty_print(tree.getroot());
 
+    # print XML
+    if opts.output:
+        with open(str(opts.output), 'w') as f:
+            tree.write(f, encoding='unicode', xml_declaration=True);
+    else:
+        tree.write(sys.stdout, encoding='unicode', xml_declaration=True);